@@ -0,0 +1,249 @@
+# batch_cover_letters.py
+# Headless batch mode for cover_letter_generator.py: one resume, many job descriptions.
+#
+#   python batch_cover_letters.py --resume me.pdf --jobs postings/ --out letters/ --workers 4
+#   python batch_cover_letters.py --resume me.pdf --jobs postings.jsonl --out letters/
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cover_letter_generator import (
+    RESUME_MAX_CHARS,
+    PipelineError,
+    configure_pipeline_pool,
+    extract_text_from_file,
+    resume_cache_stats,
+    run_pipeline,
+)
+import tracing
+
+JOB_EXTENSIONS = (".txt", ".md")
+STAGES = ("detect", "compact", "generate", "render", "docx", "pdf")
+
+
+# ==================== JOB LOADING ====================
+def _safe_id(value: str) -> str:
+    return re.sub(r'[^\w\-_]', '_', value)
+
+
+def _unique_id(job_id: str, suffix: str, seen: set) -> str:
+    """``job_id``, or with ``suffix`` (then a counter) when an earlier job already names the same files."""
+    candidate, n = job_id, 1
+    while candidate.lower() in seen:
+        candidate = f"{job_id}_{suffix}" if n == 1 else f"{job_id}_{suffix}_{n}"
+        n += 1
+    seen.add(candidate.lower())
+    return candidate
+
+
+def load_jobs(jobs_path: str):
+    """Return a list of (job_id, job_description, error) from a directory or a .jsonl file.
+
+    JSONL lines may use "job_description", "description" or "text" for the posting
+    and an optional "id"; otherwise the line number is used. Ids are unique (ignoring
+    case), since they name the output files: a repeat gets the file extension or line
+    number appended. A line that cannot be read has job_description None and an error.
+    """
+    jobs = []
+    seen = set()
+    if os.path.isdir(jobs_path):
+        for name in sorted(os.listdir(jobs_path)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in JOB_EXTENSIONS:
+                continue
+            with open(os.path.join(jobs_path, name), "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read().strip()
+            if text:
+                jobs.append((_unique_id(_safe_id(stem), ext.lstrip(".").lower(), seen), text, None))
+    else:
+        with open(jobs_path, "r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    jobs.append((_unique_id(str(lineno), "line", seen), None, f"line {lineno}: invalid JSON: {e}"))
+                    continue
+                if not isinstance(row, dict):
+                    jobs.append((_unique_id(str(lineno), "line", seen), None,
+                                 f"line {lineno}: expected a JSON object, got {type(row).__name__}"))
+                    continue
+                text = row.get("job_description") or row.get("description") or row.get("text") or ""
+                if isinstance(text, str) and text.strip():
+                    job_id = _unique_id(_safe_id(str(row.get("id", lineno))), f"line{lineno}", seen)
+                    jobs.append((job_id, text.strip(), None))
+    return jobs
+
+
+def output_base(resume_name: str, job_id: str) -> str:
+    return f"cover_letter_{resume_name}_{job_id}"
+
+
+def output_paths(out_dir: str, base_name: str):
+    base = os.path.join(out_dir, base_name)
+    return f"{base}.docx", f"{base}.pdf"
+
+
+# ==================== ONE JOB ====================
+def process_job(resume_text: str, job_id: str, job_desc: str, out_dir: str, base_name: str,
+                drafts: int = None) -> dict:
+    """Run the cover letter pipeline for one posting. Never raises."""
+    result = {"id": job_id, "status": "ok", "timings": {}}
+    started = time.perf_counter()
+    try:
+        outcome = run_pipeline(job_desc, resume_text=resume_text, out_dir=out_dir, base_name=base_name,
+                               drafts=drafts)
+        result["company"] = outcome["company"]
+        result["timings"] = outcome["timings"]
+        result["tokens_saved"] = outcome["tokens_saved"]
+        if not outcome["passed"]:
+            # Still written, but outside the word range or with a placeholder
+            result["warnings"] = outcome["problems"]
+        result["files"] = [outcome["docx"], outcome["pdf"]]
+    except PipelineError as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"pipeline: {e}"
+    result["total"] = time.perf_counter() - started
+    return result
+
+
+# ==================== BATCH ====================
+def percentile(values, pct):
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(results, elapsed: float) -> dict:
+    done = [r for r in results if r["status"] == "ok"]
+    summary = {
+        "jobs": len(results),
+        "ok": len(done),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
+        "errors": sum(1 for r in results if r["status"] == "error"),
+        "needs_review": sum(1 for r in done if r.get("warnings")),
+        "elapsed_s": round(elapsed, 3),
+        "jobs_per_min": round(len(done) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "prompt_tokens_saved": sum(r.get("tokens_saved", 0) for r in done),
+        "stages": {},
+    }
+    for stage in STAGES + ("total",):
+        if stage == "total":
+            values = [r["total"] for r in done]
+        else:
+            values = [r["timings"][stage] for r in done if stage in r["timings"]]
+        summary["stages"][stage] = {
+            "p50_s": round(percentile(values, 50), 3),
+            "p95_s": round(percentile(values, 95), 3),
+        }
+    return summary
+
+
+def run_batch(resume_path: str, jobs_path: str, out_dir: str, workers: int = 4,
+              force: bool = False, on_result=None, drafts: int = None,
+              resume_max_chars: int = RESUME_MAX_CHARS) -> dict:
+    """Generate a DOCX + PDF cover letter per job with a bounded worker pool.
+
+    Jobs whose outputs already exist are skipped unless ``force`` is set, so an
+    interrupted run can simply be restarted. PDF resumes are parsed only up to
+    ``resume_max_chars`` characters (0 for all). Returns the throughput summary with
+    the per-job results under "results".
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    resume_text = extract_text_from_file(resume_path, max_chars=resume_max_chars or None)
+    resume_name = _safe_id(os.path.splitext(os.path.basename(resume_path))[0])
+
+    results = []
+    pending = []
+    for job_id, job_desc, error in load_jobs(jobs_path):
+        if error is not None:
+            result = {"id": job_id, "status": "error", "error": error, "timings": {}, "total": 0.0}
+            results.append(result)
+            if on_result:
+                on_result(result)
+            continue
+        base_name = output_base(resume_name, job_id)
+        docx_path, pdf_path = output_paths(out_dir, base_name)
+        if not force and os.path.exists(docx_path) and os.path.exists(pdf_path):
+            result = {"id": job_id, "status": "skipped", "timings": {}, "total": 0.0}
+            results.append(result)
+            if on_result:
+                on_result(result)
+            continue
+        pending.append((job_id, job_desc, out_dir, base_name))
+
+    started = time.perf_counter()
+    configure_pipeline_pool(workers)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(process_job, resume_text, *job, drafts) for job in pending]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+    summary = summarize(results, time.perf_counter() - started)
+    summary["resume_cache"] = resume_cache_stats()
+    summary["llm"] = tracing.snapshot()["llm"]
+    summary["results"] = results
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate cover letters for many job descriptions.")
+    parser.add_argument("--resume", required=True, help="Resume file (.docx, .pdf, .txt)")
+    parser.add_argument("--jobs", required=True, help="Directory of .txt/.md postings or a .jsonl file")
+    parser.add_argument("--out", default="cover_letters", help="Output directory")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent jobs")
+    parser.add_argument("--force", action="store_true", help="Regenerate jobs whose outputs exist")
+    parser.add_argument("--log", help="Append per-job results as JSONL to this file")
+    parser.add_argument("--drafts", type=int, default=None,
+                        help="Concurrent drafts per letter; the first within the word range wins")
+    parser.add_argument("--resume-max-chars", type=int, default=RESUME_MAX_CHARS,
+                        help="Stop parsing a PDF resume after this many characters (0 parses all)")
+    parser.add_argument("--trace", default=os.environ.get("TRACE_LOG"),
+                        help="Append per-stage spans (with LLM token counts) as JSONL to this file")
+    args = parser.parse_args(argv)
+    tracing.enable_jsonl(args.trace)
+
+    log = open(args.log, "a", encoding="utf-8") if args.log else None
+
+    def on_result(result):
+        line = f"[{result['status']:>7}] {result['id']}"
+        if result["status"] == "ok":
+            line += f" → {result['company']} ({result['total']:.1f}s)"
+            if result.get("warnings"):
+                line += f" needs review: {'; '.join(result['warnings'])}"
+        elif result["status"] == "error":
+            line += f" → {result['error']}"
+        print(line, flush=True)
+        if log:
+            log.write(json.dumps(result) + "\n")
+            log.flush()
+
+    try:
+        summary = run_batch(args.resume, args.jobs, args.out, args.workers, args.force, on_result, args.drafts,
+                            args.resume_max_chars)
+    finally:
+        if log:
+            log.close()
+
+    summary.pop("results")
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
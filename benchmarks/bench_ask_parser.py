@@ -0,0 +1,84 @@
+# bench_ask_parser.py
+# Micro-benchmark: legacy /ask post-processing vs web/ask_parser.PageParser.
+#
+#   python benchmarks/bench_ask_parser.py [--kb 300] [--repeat 20]
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "web"))
+from ask_parser import PageParser, parse_page
+
+
+def legacy_parse(raw):
+    """The original ask() post-processing, kept verbatim as the baseline."""
+    text = raw.strip()
+    text = re.sub(r"^```json\s*|```$", "", text, flags=re.MULTILINE)
+    start = text.find("{")
+    end = text.rfind("}") + 1
+    if start == -1 or end == 0:
+        raise ValueError("No JSON found")
+    data = json.loads(text[start:end])
+    explanation = data.get("explanation", "No explanation provided.")
+    html_from_ai = data.get("html", "").strip()
+    style_match = re.search(r"<style.*?>.*?</style>", html_from_ai, re.DOTALL | re.IGNORECASE)
+    style = style_match.group(0) if style_match else ""
+    body = re.sub(r"<style.*?>.*?</style>", "", html_from_ai, re.DOTALL | re.IGNORECASE).strip()
+    return explanation, f"<head>{style}</head><body>{body}</body>"
+
+
+def make_reply(kb):
+    css = "\n".join(f".c{i} {{ color: #{i % 999:03d}; margin: {i % 7}px; }}" for i in range(kb * 4))
+    section = '<section class="c1"><h2>Title</h2><p>Lorem ipsum "dolor" sit amet {x}.</p></section>\n'
+    body = section * (kb * 1024 // len(section))
+    html = f"<style>\n{css}\n</style>\n{body}"
+    return "```json\n" + json.dumps({"explanation": "A landing page.", "html": html}) + "\n```"
+
+
+def stream_new(tokens):
+    parser = PageParser()
+    for token in tokens:
+        parser.feed(token)
+    return parser.finish()
+
+
+def stream_legacy(tokens):
+    return legacy_parse("".join(tokens))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kb", type=int, default=300, help="Approximate size of the generated HTML")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    raw = make_reply(args.kb)
+    tokens = [raw[i:i + 4] for i in range(0, len(raw), 4)]
+    results = {"reply_bytes": len(raw), "tokens": len(tokens)}
+
+    def best_ms(fn):
+        return round(min(timeit.repeat(fn, number=1, repeat=args.repeat)) * 1000, 3)
+
+    # Complete reply in hand (the /ask route)
+    results["legacy_full_ms"] = best_ms(lambda: legacy_parse(raw))
+    results["parser_full_ms"] = best_ms(lambda: parse_page(raw))
+    results["speedup_full"] = round(results["legacy_full_ms"] / results["parser_full_ms"], 2)
+
+    # Streamed reply (the /ask/stream route): feed() runs while tokens are still being
+    # generated, so only the work after the last token adds user-visible latency
+    fed = PageParser()
+    for token in tokens:
+        fed.feed(token)
+    results["legacy_after_last_token_ms"] = best_ms(lambda: stream_legacy(tokens))
+    results["parser_after_last_token_ms"] = best_ms(fed.finish)
+    results["speedup_after_last_token"] = round(
+        results["legacy_after_last_token_ms"] / results["parser_after_last_token_ms"], 2)
+    results["parser_feed_us_per_token"] = round(best_ms(lambda: stream_new(tokens)) * 1000 / len(tokens), 3)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
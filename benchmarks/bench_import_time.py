@@ -0,0 +1,133 @@
+# bench_import_time.py
+# Cold-start guard for the entry points, measured with `python -X importtime`.
+#
+# Each target runs in a fresh interpreter. "Deferred" modules (python-docx, PyPDF2,
+# ReportLab, ollama/httpx) must not be imported before first paint / first request;
+# the run fails if one is, or if a median time exceeds its budget.
+#
+#   python benchmarks/bench_import_time.py [--runs 5] [--gui] [--top 10]
+#       [--budget gui_import=400 --budget web_first_request=1500]   (milliseconds)
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFERRED = ("docx", "PyPDF2", "reportlab", "ollama", "httpx")
+
+# Each snippet prints one JSON line: {"elapsed_s": ..., "deferred_loaded": [...]}
+_REPORT = """
+import json, sys, time
+print(json.dumps({{"elapsed_s": time.perf_counter() - _t0,
+                  "deferred_loaded": sorted(m for m in {deferred!r} if m in sys.modules)}}))
+"""
+
+TARGETS = {
+    # The GUI module up to the point CoverLetterApp can be built
+    "gui_import": """
+import time; _t0 = time.perf_counter()
+import cover_letter_generator
+""",
+    # Window created and drawn once (needs a display; enable with --gui)
+    "gui_first_paint": """
+import time; _t0 = time.perf_counter()
+import tkinter as tk
+import cover_letter_generator
+root = tk.Tk()
+cover_letter_generator.CoverLetterApp(root)
+root.update()
+""",
+    # Flask app imported and the first page rendered
+    "web_first_request": """
+import time; _t0 = time.perf_counter()
+import os, sys
+sys.path.insert(0, os.path.join(os.getcwd(), "web"))
+from app import app
+assert app.test_client().get("/").status_code == 200
+""",
+    "batch_import": """
+import time; _t0 = time.perf_counter()
+import batch_cover_letters
+""",
+}
+
+# Imported by the interpreter itself before the snippet runs
+_STARTUP = {"site", "encodings", "_frozen_importlib_external", "zipimport", "codecs", "io", "abc", "os", "stat",
+            "_collections_abc", "posixpath", "genericpath", "os.path", "_sitebuiltins", "time"}
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_target(name, code):
+    """One fresh interpreter: (elapsed seconds, deferred modules loaded, entry-level import timings)."""
+    script = code + _REPORT.format(deferred=DEFERRED)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", script], cwd=ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{name} failed:\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    # Indent is 1 space at depth 0 plus 2 per level: keep the entry module and what it imports
+    imports = {}
+    for match in _IMPORTTIME.finditer(proc.stderr):
+        if len(match.group(3)) <= 3 and match.group(4) not in _STARTUP:
+            imports[match.group(4)] = int(match.group(2))
+    return result["elapsed_s"], result["deferred_loaded"], imports
+
+
+def parse_budgets(items):
+    budgets = {}
+    for item in items or []:
+        name, _, ms = item.partition("=")
+        if name not in TARGETS or not ms:
+            raise SystemExit(f"--budget expects <target>=<ms> with target in {', '.join(TARGETS)}")
+        budgets[name] = float(ms)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and guard entry-point import time")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per target")
+    parser.add_argument("--gui", action="store_true", help="also time the first paint of the Tk window")
+    parser.add_argument("--top", type=int, default=10, help="slowest entry-level imports to list")
+    parser.add_argument("--budget", action="append", help="<target>=<milliseconds>, repeatable")
+    args = parser.parse_args()
+    budgets = parse_budgets(args.budget)
+
+    report, failures = {}, []
+    for name, code in TARGETS.items():
+        if name == "gui_first_paint" and not args.gui:
+            continue
+        try:
+            runs = [run_target(name, code) for _ in range(max(1, args.runs))]
+        except RuntimeError as e:
+            report[name] = {"error": str(e)}
+            failures.append(f"{name}: could not run")
+            continue
+
+        elapsed = [r[0] * 1000 for r in runs]
+        deferred = sorted({m for r in runs for m in r[1]})
+        # Cumulative microseconds of the entry module and its direct imports, from the median run
+        median_run = sorted(runs, key=lambda r: r[0])[len(runs) // 2]
+        slowest = sorted(median_run[2].items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        report[name] = {
+            "median_ms": round(statistics.median(elapsed), 1),
+            "min_ms": round(min(elapsed), 1),
+            "max_ms": round(max(elapsed), 1),
+            "deferred_loaded": deferred,
+            "slowest_imports_ms": {module: round(us / 1000, 1) for module, us in slowest},
+        }
+        if deferred:
+            failures.append(f"{name}: imported {', '.join(deferred)} at startup")
+        if name in budgets and report[name]["median_ms"] > budgets[name]:
+            failures.append(f"{name}: {report[name]['median_ms']}ms over the {budgets[name]:.0f}ms budget")
+
+    report["failures"] = failures
+    print(json.dumps(report, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
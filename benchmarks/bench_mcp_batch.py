@@ -0,0 +1,106 @@
+# bench_mcp_batch.py
+# Per-element MCP tool calls vs one batch call over stdio against mcp_apps/mcp_server.py.
+#
+#   python benchmarks/bench_mcp_batch.py [--n 2000]
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import struct
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "mcp_apps", "mcp_server.py")
+
+
+def tool_value(result):
+    """The tool's return value, from structured content when the SDK provides it."""
+    if result.isError:
+        raise RuntimeError(result.content[0].text if result.content else "tool error")
+    structured = getattr(result, "structuredContent", None)
+    if structured is not None:
+        return structured.get("result", structured)
+    if len(result.content) > 1:
+        return [json.loads(item.text) for item in result.content]
+    text = result.content[0].text
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def encode(values):
+    return base64.b64encode(struct.pack(f"<{len(values)}d", *values)).decode("ascii")
+
+
+def decode(text):
+    raw = base64.b64decode(text)
+    return list(struct.unpack(f"<{len(raw) // 8}d", raw))
+
+
+async def timed(coro):
+    started = time.perf_counter()
+    value = await coro
+    return value, time.perf_counter() - started
+
+
+async def run(n):
+    values = [random.uniform(-1000, 1000) for _ in range(n)]
+    expected_add = [v + 1.5 for v in values]
+    expected_sum = sum(values)
+    params = StdioServerParameters(command=sys.executable, args=[SERVER_SCRIPT])
+
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            await session.call_tool("add", {"a": 0, "b": 0})  # warm up the server
+
+            async def per_element_add():
+                return [tool_value(await session.call_tool("add", {"a": v, "b": 1.5})) for v in values]
+
+            async def per_element_sum():
+                total = 0.0
+                for v in values:
+                    total = tool_value(await session.call_tool("add", {"a": total, "b": v}))
+                return total
+
+            async def batch(name, arguments):
+                return tool_value(await session.call_tool(name, arguments))
+
+            results = {"n": n}
+            got, results["per_element_add_s"] = await timed(per_element_add())
+            assert all(abs(x - y) < 1e-6 for x, y in zip(got, expected_add))
+            got, results["batch_add_list_s"] = await timed(batch("batch_add", {"a": values, "b": 1.5}))
+            assert all(abs(x - y) < 1e-6 for x, y in zip(got, expected_add))
+            got, results["batch_add_base64_s"] = await timed(batch("batch_add", {"a": encode(values), "b": 1.5}))
+            assert all(abs(x - y) < 1e-6 for x, y in zip(decode(got), expected_add))
+
+            got, results["per_element_sum_s"] = await timed(per_element_sum())
+            assert abs(got - expected_sum) < 1e-3
+            got, results["batch_reduce_s"] = await timed(batch("batch_reduce", {"values": encode(values)}))
+            assert abs(got - expected_sum) < 1e-3
+
+    for key in list(results):
+        if key.endswith("_s"):
+            results[key] = round(results[key], 4)
+    results["add_speedup_list"] = round(results["per_element_add_s"] / results["batch_add_list_s"], 1)
+    results["add_speedup_base64"] = round(results["per_element_add_s"] / results["batch_add_base64_s"], 1)
+    results["sum_speedup"] = round(results["per_element_sum_s"] / results["batch_reduce_s"], 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=2000, help="numbers in the dataset")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.n)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
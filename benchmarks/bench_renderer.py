@@ -0,0 +1,119 @@
+# bench_renderer.py
+# Letters rendered per second: original save_as_docx/save_as_pdf vs letter_renderer.
+#
+#   python benchmarks/bench_renderer.py [--letters 40] [--pdf-workers 4]
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from letter_renderer import LetterRenderer, classify_lines, render_docx, render_pdf
+
+from docx import Document as OutDocx
+from docx.shared import Pt
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+SAMPLE_LETTER = """Jane Doe
+jane.doe@example.com | (555) 123-4567 | Seattle, WA
+
+Dear Hiring Manager,
+
+""" + "\n\n".join(
+    "I am excited to apply for the Backend Engineer role. Over the past five years I have built "
+    "and operated Python services on Kubernetes, cut p95 latency by 40% and mentored four engineers."
+    for _ in range(5)
+) + "\n\nSincerely,\nJane Doe\n"
+
+
+def legacy_save_as_docx(text, filepath):
+    doc = OutDocx()
+    style = doc.styles['Normal']
+    style.font.name = 'Calibri'
+    style.font.size = Pt(11)
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        p = doc.add_paragraph(line)
+        if "@" in line or re.match(r"[\d\s\-\(\)]{8,}", line) or len(line) < 60:
+            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            p.runs[0].bold = True
+            p.space_after = Pt(12)
+        else:
+            p.space_after = Pt(8)
+    doc.save(filepath)
+
+
+def legacy_save_as_pdf(text, filepath):
+    doc = SimpleDocTemplate(filepath, pagesize=letter, rightMargin=72, leftMargin=72,
+                            topMargin=80, bottomMargin=72)
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='CenterBold', parent=styles['Normal'], alignment=1,
+                              fontSize=11, spaceAfter=12, fontName='Helvetica-Bold'))
+    story = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            story.append(Spacer(1, 6))
+            continue
+        if "@" in line or re.match(r"[\d\s\-\(\)]{8,}", line) or len(line) < 60:
+            story.append(Paragraph(line, styles['CenterBold']))
+        else:
+            story.append(Paragraph(line, styles['Normal']))
+        story.append(Spacer(1, 6))
+    doc.build(story)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--letters", type=int, default=40)
+    parser.add_argument("--pdf-workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out:
+        paths = [(os.path.join(out, f"l{i}.docx"), os.path.join(out, f"l{i}.pdf")) for i in range(args.letters)]
+
+        def legacy():
+            for docx_path, pdf_path in paths:
+                legacy_save_as_docx(SAMPLE_LETTER, docx_path)
+                legacy_save_as_pdf(SAMPLE_LETTER, pdf_path)
+
+        def serial():
+            for docx_path, pdf_path in paths:
+                lines = classify_lines(SAMPLE_LETTER)
+                render_docx(lines, docx_path)
+                render_pdf(lines, pdf_path)
+
+        renderer = LetterRenderer(pdf_workers=args.pdf_workers)
+        renderer.render(SAMPLE_LETTER, *paths[0])  # start the pools outside the timing
+
+        def per_letter():
+            for docx_path, pdf_path in paths:
+                renderer.render(SAMPLE_LETTER, docx_path, pdf_path)
+
+        def batch():
+            renderer.render_many([(SAMPLE_LETTER, d, p) for d, p in paths])
+
+        results = {"letters": args.letters, "pdf_workers": renderer.pdf_workers}
+        for name, fn in (("legacy", legacy), ("renderer_serial", serial),
+                         ("renderer_parallel", per_letter), ("renderer_batch", batch)):
+            results[f"{name}_letters_per_s"] = round(args.letters / timed(fn), 2)
+        renderer.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# fake_ollama.py
+# Local stand-in for the Ollama HTTP API so the LLM paths can be benchmarked without a GPU.
+#
+# Implements /api/generate and /api/chat (single JSON or NDJSON streaming), /api/tags,
+# /api/version and /api/show. Each request waits `first_token_s` (prompt evaluation) and
+# then emits tokens at `tokens_per_s`; at most `num_parallel` requests generate at once,
+# like OLLAMA_NUM_PARALLEL. Replies are canned by request type: a company name for the
+# company prompt, a ~360-word letter for generate, the {"explanation", "html"} object
+# for /ask, and one `add` tool call followed by an answer when tools are offered.
+#
+#   python benchmarks/fake_ollama.py [--port 11435] [--first-token 0.05] [--tps 200]
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_MODEL = "fake-llm:latest"
+
+COMPANY_REPLY = "Acme Robotics"
+
+LETTER_REPLY = "\n\n".join([
+    "Jane Doe\njane.doe@example.com | (555) 123-4567",
+    "Dear Hiring Manager,",
+    "I am excited to apply for the Backend Engineer role at Acme Robotics. Over the past five years "
+    "I have designed, shipped and operated Python services that handle millions of requests a day, "
+    "and the problems described in your posting are the ones I enjoy solving most.",
+] + [
+    "At my current company I led the migration of our order pipeline to an event-driven design, "
+    "cutting p95 latency by forty percent while reducing infrastructure cost. I partnered with product "
+    "and operations teams to define service level objectives, built the dashboards we still use, and "
+    "mentored four engineers who now own critical services themselves."
+] * 5 + [
+    "I would welcome the chance to bring this experience to Acme Robotics and to learn from your team. "
+    "Thank you for your time and consideration.",
+    "Sincerely,\nJane Doe",
+])
+
+PAGE_REPLY = json.dumps({
+    "explanation": "A simple landing page with a header, a short pitch and a call to action.",
+    "html": "<style>body{font-family:sans-serif;margin:2rem}h1{color:#234}"
+            ".cta{padding:.6rem 1rem;background:#234;color:#fff;border-radius:4px}</style>"
+            "<h1>Welcome</h1><p>" + "This page was generated for the benchmark. " * 20 + "</p>"
+            "<a class='cta' href='#'>Get started</a>",
+})
+
+ANSWER_REPLY = "The result is 5."
+
+_TOKEN = re.compile(r"\s*\S+")
+
+
+def tokens(text):
+    """Split into word-sized tokens that join back into ``text``."""
+    return _TOKEN.findall(text) or [text]
+
+
+def _tool_name(tool):
+    return (tool.get("function") or {}).get("name") or tool.get("name")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Cancelled drafts and closed streams drop the connection mid-reply; that is expected
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError, ConnectionAbortedError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeOllama:
+    def __init__(self, host="127.0.0.1", port=0, first_token_s=0.05, tokens_per_s=200.0, num_parallel=4):
+        self.first_token_s = first_token_s
+        self.tokens_per_s = tokens_per_s
+        self.requests = 0
+        self._slots = threading.Semaphore(num_parallel)
+        self._count_lock = threading.Lock()
+        handler = type("Handler", (_Handler,), {"fake": self})
+        self.server = _Server((host, port), handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True, name="fake-ollama")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------- canned replies ----------
+    def reply_for(self, path, body):
+        """Return (text, tool_calls) for one request."""
+        if path == "/api/generate":
+            prompt = body.get("prompt", "")
+            return (COMPANY_REPLY if "company name" in prompt.lower() else LETTER_REPLY), None
+        messages = body.get("messages") or []
+        tools = [_tool_name(t) for t in body.get("tools") or []]
+        last_user = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+        answered = any(m.get("role") == "tool" for m in messages[last_user + 1:])
+        if "add" in tools and not answered:
+            return "", [{"function": {"name": "add", "arguments": {"a": 2, "b": 3}}}]
+        if tools:
+            return ANSWER_REPLY, None
+        return PAGE_REPLY, None
+
+    def generate_tokens(self, text):
+        """Yield tokens with simulated prompt-eval and generation latency."""
+        with self._slots:
+            time.sleep(self.first_token_s)
+            interval = 1.0 / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+            next_at = time.perf_counter()
+            for token in tokens(text):
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                yield token
+
+
+class _Handler(BaseHTTPRequestHandler):
+    fake = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, data, status=200):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._json({"models": [{"name": FAKE_MODEL, "model": FAKE_MODEL, "size": 0}]})
+        elif self.path == "/api/version":
+            self._json({"version": "0.0.0-fake"})
+        else:
+            self._json({"error": "not found"}, 404)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/api/show":
+            self._json({"modelfile": "", "details": {"family": "fake"}})
+            return
+        if self.path not in ("/api/generate", "/api/chat"):
+            self._json({"error": "not found"}, 404)
+            return
+        with self.fake._count_lock:
+            self.fake.requests += 1
+
+        text, tool_calls = self.fake.reply_for(self.path, body)
+        prompt_text = body.get("prompt") or json.dumps(body.get("messages") or [])
+        started = time.perf_counter_ns()
+        is_chat = self.path == "/api/chat"
+        model = body.get("model") or FAKE_MODEL
+
+        def chunk(piece, done=False, **extra):
+            data = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "done": done}
+            if is_chat:
+                data["message"] = {"role": "assistant", "content": piece}
+            else:
+                data["response"] = piece
+            data.update(extra)
+            return data
+
+        def final(count):
+            total = time.perf_counter_ns() - started
+            prompt_eval = int(self.fake.first_token_s * 1e9)
+            data = chunk("", done=True, done_reason="stop", total_duration=total, load_duration=0,
+                         prompt_eval_count=max(1, len(prompt_text) // 4), prompt_eval_duration=prompt_eval,
+                         eval_count=count, eval_duration=max(0, total - prompt_eval))
+            if tool_calls and is_chat:
+                data["message"]["tool_calls"] = tool_calls
+            return data
+
+        if not body.get("stream", True):
+            parts = list(self.fake.generate_tokens(text))
+            data = final(len(parts))
+            if is_chat:
+                data["message"]["content"] = "".join(parts)
+            else:
+                data["response"] = "".join(parts)
+            self._json(data)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(data):
+            line = (json.dumps(data) + "\n").encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.flush()
+
+        count = 0
+        try:
+            for token in self.fake.generate_tokens(text):
+                count += 1
+                send(chunk(token))
+            send(final(count))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            pass  # client cancelled the stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Ollama server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--first-token", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--tps", type=float, default=200.0, help="tokens per second per request")
+    parser.add_argument("--num-parallel", type=int, default=4)
+    args = parser.parse_args()
+    fake = FakeOllama(args.host, args.port, args.first_token, args.tps, args.num_parallel)
+    print(f"Fake Ollama listening on {fake.url} (OLLAMA_HOST={fake.url})")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,41 +4,89 @@ import os
 import threading
 import re
 import threading
+import json
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-# Resume reading
-from docx import Document as DocxDocument
-import PyPDF2
+# Resume reading (python-docx / PyPDF2) and output rendering (python-docx / ReportLab)
+# are imported on first use or by warm_up(), so the window appears without them.
 
-# LangChain + Ollama
-from langchain_community.llms import Ollama
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+# Persistent cache for extracted resume text
+from disk_cache import DiskCache, content_key, file_digest
+
+# Prompt-size budgeting
+from text_compaction import CHARS_PER_TOKEN, PROMPT_TOKEN_BUDGET, compact_job_description, compact_prompt_inputs
+
+# Shared Ollama client (pooled connections, model kept warm between calls)
+from ollama_client import generate, get_client, settings as ollama_settings
 
 # Output formats
-from docx import Document as OutDocx
-from docx.shared import Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+from letter_renderer import classify_lines, default_renderer, render_docx, render_pdf
+from letter_renderer import warm_up as warm_up_renderer
 
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+# Stage timings + token metrics (appended as JSONL only when TRACE_LOG=<path> is set)
+import tracing
 
 
 # ==================== RESUME TEXT EXTRACTION ====================
-def extract_text_from_file(path):
+# Bump when the extraction logic changes so stale cache entries are ignored
+EXTRACTOR_VERSION = "2"
+RESUME_CACHE_MAX_BYTES = int(os.environ.get("RESUME_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Resume characters worth parsing: four times what the whole prompt can hold, so compaction
+# still has plenty to choose from. PDF parsing stops here; 0 parses everything.
+RESUME_MAX_CHARS = int(os.environ.get("RESUME_MAX_CHARS", 4 * PROMPT_TOKEN_BUDGET * CHARS_PER_TOKEN))
+
+resume_cache = DiskCache("resume_text", max_bytes=RESUME_CACHE_MAX_BYTES)
+_parse_seconds_saved = 0.0
+_stats_lock = threading.Lock()
+
+
+@tracing.traced("extract")
+def extract_text_from_file(path, use_cache=True, max_chars=None, max_pages=None):
+    """Return the resume text, reusing the cached parse when the file content is unchanged.
+
+    ``max_pages`` / ``max_chars`` stop PDF parsing once enough text has been collected
+    for the prompt.
+    """
+    global _parse_seconds_saved
     ext = os.path.splitext(path)[1].lower()
+    tracing.annotate(ext=ext, cached=False)
+    # Plain text is as cheap to read as it is to hash, so only parsed formats are cached
+    if not use_cache or ext not in (".docx", ".pdf"):
+        return _extract_text_uncached(path, ext, max_chars, max_pages)
+
+    key = content_key(EXTRACTOR_VERSION, ext, str(max_chars), str(max_pages), file_digest(path))
+    cached = resume_cache.get(key)
+    if cached is not None:
+        entry = json.loads(cached)
+        tracing.annotate(cached=True)
+        with _stats_lock:
+            _parse_seconds_saved += entry["parse_s"]
+        return entry["text"]
+
+    started = time.perf_counter()
+    text = _extract_text_uncached(path, ext, max_chars, max_pages)
+    parse_s = time.perf_counter() - started
+    resume_cache.set(key, json.dumps({"text": text, "parse_s": parse_s}))
+    return text
+
+
+def resume_cache_stats() -> dict:
+    """Hit/miss counters for the resume cache plus the parse time hits have skipped."""
+    stats = resume_cache.stats()
+    stats["parse_seconds_saved"] = round(_parse_seconds_saved, 3)
+    return stats
+
+
+def _extract_text_uncached(path, ext, max_chars=None, max_pages=None):
     if ext == ".docx":
+        from docx import Document as DocxDocument
         doc = DocxDocument(path)
         return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
     elif ext == ".pdf":
-        text = ""
-        with open(path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        return text
+        return join_pdf_pages(iter_pdf_pages(path, workers=PDF_WORKERS, max_pages=max_pages),
+                              max_chars=max_chars)
     elif ext == ".txt":
         with open(path, "r", encoding="utf-8", errors="ignore") as f:
             return f.read()
@@ -46,30 +94,79 @@ def extract_text_from_file(path):
         raise ValueError("Only .docx, .pdf, .txt supported")
 
 
-def detect_company_name(job_description: str) -> str:
-    prompt = f"""
+# ==================== STREAMING PDF EXTRACTION ====================
+# Documents with at least this many pages are fanned out across a process pool
+PDF_PARALLEL_MIN_PAGES = 12
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+def _extract_pdf_page_range(path, start, stop):
+    """Worker: extract text for pages [start, stop) with its own PdfReader."""
+    import PyPDF2
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(path, workers=1, max_pages=None):
+    """Yield the text of each PDF page in order.
+
+    With ``workers`` > 1 and a long document, page ranges are parsed in a process
+    pool; pages are still yielded in order as soon as their range is done. Closing
+    the generator early cancels the ranges that have not started yet.
+    """
+    import PyPDF2
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        page_count = len(reader.pages)
+        if max_pages is not None:
+            page_count = min(page_count, max_pages)
+
+        if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+            for i in range(page_count):
+                yield reader.pages[i].extract_text() or ""
+            return
+
+    # Small ranges keep early pages flowing while later ones are still parsing
+    chunk = max(1, min(8, page_count // (workers * 2)))
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(_extract_pdf_page_range, path, start, min(start + chunk, page_count))
+                   for start in range(0, page_count, chunk)]
+        for future in futures:
+            yield from future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def join_pdf_pages(pages, max_chars=None):
+    """Join page texts with newlines in one pass, stopping once ``max_chars`` is reached."""
+    parts = []
+    total = 0
+    for page_text in pages:
+        if not page_text:
+            continue
+        parts.append(page_text)
+        total += len(page_text) + 1
+        if max_chars is not None and total >= max_chars:
+            if hasattr(pages, "close"):
+                pages.close()
+            break
+    text = "\n".join(parts) + "\n" if parts else ""
+    return text[:max_chars] if max_chars is not None else text
+
+
+# ==================== PROMPTS ====================
+COMPANY_PROMPT = """
 Extract ONLY the company name from this job description. 
 Look for phrases like "at Google", "join Microsoft", "Company XYZ is hiring", "About Acme Inc", etc.
 Return ONLY the company name, nothing else. If unsure, return "Company".
 
 Job Description:
-{job_description[:3000]}  # first part is enough
+{job}
 """
 
-    try:
-        llm = Ollama(model="gemma3:4b", temperature=0.1)
-        chain = LLMChain(llm=llm, prompt=PromptTemplate.from_template(prompt))
-        result = chain.run({})
-        name = result.strip().strip('"').strip("'").strip()
-        if name.lower() in ["company", "hiring", "we", "our team", ""]:
-            return "Company"
-        return name
-    except:
-        return "Company"
-
-
-def generate_cover_letter(resume_text: str, job_description: str) -> str:
-    template = """
+COVER_LETTER_PROMPT = """
 You are a world-class career writer.
 
 Rules:
@@ -87,65 +184,492 @@ Write a powerful, concise (320–420 words), ATS-friendly cover letter that perf
 {job}
 """
 
-    prompt = PromptTemplate.from_template(template)
-    llm = Ollama(model="gemma3:4b", temperature=0.35)
-    chain = LLMChain(llm=llm, prompt=prompt)
-    return chain.run(resume=resume_text, job=job_description)
 
+# ==================== COMPANY NAME DETECTION ====================
+# Bump when the heuristics or prompt change so memoized answers are recomputed
+COMPANY_DETECTOR_VERSION = "4"
+COMPANY_PROMPT_TOKENS = 750
+company_cache = DiskCache("company_names", max_bytes=4 * 1024 * 1024)
+
+# Up to four capitalized words on one line: "Google", "Acme Robotics Inc.", "Procter & Gamble".
+# A period only continues a word ("Booking.com") or ends a known suffix ("Inc."), so the
+# capture stops at the end of a sentence.
+_WORD = r"(?:(?:Inc|Co|Corp|Ltd|Bros|LLC|L\.L\.C)\.|[A-Z][\w&'\-]*(?:\.[\w&'\-]+)*)"
+_NAME = r"(" + _WORD + r"(?:[ \t]+(?:&[ \t]+)?" + _WORD + r"){0,3})"
+_STRONG_COMPANY_PATTERNS = [
+    re.compile(r"^[ \t]*Company(?:[ \t]+Name)?[ \t]*:[ \t]*" + _NAME, re.MULTILINE),
+    re.compile(_NAME + r"[ \t]+is[ \t]+(?:hiring|looking|seeking)\b"),
+]
+_WEAK_COMPANY_PATTERNS = [
+    # Weak because "About" also opens section headings ("About Benefits", "About You")
+    re.compile(r"^[ \t]*About[ \t]+" + _NAME, re.MULTILINE),
+    re.compile(r"\b[Aa]t[ \t]+" + _NAME),
+    re.compile(r"\b[Jj]oin[ \t]+(?:(?:the[ \t]+team|us)[ \t]+at[ \t]+)?" + _NAME),
+]
+_NOT_COMPANY_WORDS = {"the", "this", "our", "your", "us", "you", "we", "a", "an", "my", "all", "company", "hiring"}
+# Whole captures that are posting section headings, not companies
+_SECTION_HEADINGS = {"benefits", "perks", "role", "position", "job", "opportunity", "team", "us", "you",
+                     "company", "culture", "mission", "compensation", "responsibilities", "requirements",
+                     "qualifications", "description", "overview", "summary", "location", "salary"}
+_COMPANY_SUFFIX = re.compile(r"[ ,]+(?:inc|llc|ltd|corp|corporation|co|gmbh|plc)\.?$", re.IGNORECASE)
+
+
+def _company_key(name: str) -> str:
+    return _COMPANY_SUFFIX.sub("", name).lower()
+
+
+def guess_company_name(job_description: str):
+    """Cheap regex pass over the posting; returns a name or None when ambiguous.
+
+    Strong patterns ("Company: X", "X is hiring") count two votes, weak ones
+    ("About X", "at X", "join X") one; section headings such as "About Benefits" are
+    ignored. A name wins only with two or more votes and a clear lead over the runner-up.
+    """
+    text = job_description[:3000]
+    votes = {}
+    surface = {}
+    for weight, patterns in ((2, _STRONG_COMPANY_PATTERNS), (1, _WEAK_COMPANY_PATTERNS)):
+        for pattern in patterns:
+            for match in pattern.finditer(text):
+                name = match.group(1).rstrip(",;:!'-")
+                if name.endswith(".") and not _COMPANY_SUFFIX.search(name):
+                    name = name.rstrip(".")
+                if not name or name.split()[0].lower() in _NOT_COMPANY_WORDS or name.lower() in _SECTION_HEADINGS:
+                    continue
+                key = _company_key(name)
+                votes[key] = votes.get(key, 0) + weight
+                surface.setdefault(key, name)
+
+    ranked = sorted(votes.items(), key=lambda kv: kv[1], reverse=True)
+    if not ranked or ranked[0][1] < 2:
+        return None
+    if len(ranked) > 1 and ranked[1][1] >= ranked[0][1]:
+        return None
+    return surface[ranked[0][0]]
+
+
+def _detect_company_name_llm(job_description: str) -> str:
+    # The first part of the cleaned-up posting is enough to find the company
+    prompt = COMPANY_PROMPT.format(job=compact_job_description(job_description, COMPANY_PROMPT_TOKENS))
+    result = generate(prompt, temperature=0.1)["response"]
+    name = result.strip().strip('"').strip("'").strip()
+    if name.lower() in ["company", "hiring", "we", "our team", ""]:
+        return "Company"
+    return name
+
+
+def detect_company_name(job_description: str, use_cache: bool = True) -> str:
+    """Company name for a posting: memo cache, then regex heuristics, then the LLM."""
+    # Whitespace-normalized but case-preserving: "At Apple" and "at apple" can detect differently
+    key = content_key(COMPANY_DETECTOR_VERSION, " ".join(job_description.split()))
+    if use_cache:
+        cached = company_cache.get(key)
+        if cached is not None:
+            return cached
+
+    name = guess_company_name(job_description)
+    if name is None:
+        try:
+            name = _detect_company_name_llm(job_description)
+        except:
+            # Not memoized, so the next run gets another chance at the LLM
+            return "Company"
 
-# ==================== SAVE DOCX ====================
+    company_cache.set(key, name)
+    return name
+
+
+def _cover_letter_prompt(resume_text, job_description, token_budget):
+    if token_budget is not None:
+        compacted = compact_prompt_inputs(resume_text, job_description, token_budget)
+        resume_text, job_description = compacted["resume"], compacted["job"]
+    return COVER_LETTER_PROMPT.format(resume=resume_text, job=job_description)
+
+
+def stream_cover_letter(resume_text: str, job_description: str, token_budget=PROMPT_TOKEN_BUDGET):
+    """Yield the cover letter token by token as Ollama generates it."""
+    prompt = _cover_letter_prompt(resume_text, job_description, token_budget)
+    for chunk in generate(prompt, temperature=0.35, stream=True):
+        token = chunk["response"]
+        if token:
+            yield token
+
+
+def generate_cover_letter(resume_text: str, job_description: str, on_token=None,
+                          token_budget=PROMPT_TOKEN_BUDGET, drafts: int = 1, on_reset=None) -> str:
+    """Return the full cover letter; with ``on_token`` the text is streamed into it as it arrives.
+
+    Inputs are compacted to ``token_budget`` prompt tokens first; pass None to send them as-is.
+    With ``drafts`` > 1 several drafts race and the first valid one is returned
+    (see generate_cover_letter_drafts).
+    """
+    if drafts > 1:
+        return generate_cover_letter_drafts(resume_text, job_description, drafts, on_token=on_token,
+                                            on_reset=on_reset, token_budget=token_budget)["letter"]
+    if on_token is None:
+        prompt = _cover_letter_prompt(resume_text, job_description, token_budget)
+        return generate(prompt, temperature=0.35)["response"]
+    parts = []
+    for token in stream_cover_letter(resume_text, job_description, token_budget):
+        parts.append(token)
+        on_token(token)
+    return "".join(parts)
+
+
+# ==================== SPECULATIVE DRAFTS ====================
+# The prompt asks for 320–420 words and no placeholders. A draft that writes a placeholder
+# is stopped right away, and one that runs over length is stopped too while another draft
+# is still running or has finished complete, so a retry costs one generation, not one per
+# attempt. The last draft standing is always finished, so the fallback is never cut off.
+LETTER_MIN_WORDS = int(os.environ.get("LETTER_MIN_WORDS", 320))
+LETTER_MAX_WORDS = int(os.environ.get("LETTER_MAX_WORDS", 420))
+# Concurrent drafts per letter; keep at or below Ollama's OLLAMA_NUM_PARALLEL
+LETTER_DRAFTS = int(os.environ.get("LETTER_DRAFTS", 1))
+DRAFT_TEMPERATURES = (0.35, 0.55, 0.75, 0.45, 0.65)
+
+# "[Your Name]", "{company}", "<Hiring Manager Name>", "XXX", ...
+_PLACEHOLDER = re.compile(r"\[[^\]\n]{1,60}\]|\{[^}\n]{1,60}\}|<[^>@\n]{1,60}>|\bX{3,}\b")
+# ...and unbracketed ones only as a line of their own, so "your name came up" in a sentence is fine
+_PLACEHOLDER_LINE = re.compile(
+    r"^[ \t]*(?:your (?:full )?name|your (?:address|phone(?: number)?|email(?: address)?)"
+    r"|company name|company address|hiring manager(?:'s)? name|date)[ \t]*[,:]?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE)
+
+# Leaf tasks only, like _pipeline_pool; drafts queue here when more are requested than fit
+_draft_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="letter-draft")
+
+
+def validate_letter(text: str):
+    """Return the rule violations of a finished letter; an empty list means it passes."""
+    problems = []
+    words = len(text.split())
+    if words < LETTER_MIN_WORDS:
+        problems.append(f"too short ({words} words)")
+    elif words > LETTER_MAX_WORDS:
+        problems.append(f"too long ({words} words)")
+    placeholder = _find_placeholder(text)
+    if placeholder:
+        problems.append(f"placeholder {placeholder!r}")
+    return problems
+
+
+def _find_placeholder(text: str):
+    match = _PLACEHOLDER.search(text) or _PLACEHOLDER_LINE.search(text)
+    return match.group(0).strip() if match else None
+
+
+class _DraftBoard:
+    """Drafts still running and drafts finished complete, shared by one race."""
+
+    def __init__(self, drafts):
+        self.running = drafts
+        self.complete = 0
+        self._lock = threading.Lock()
+
+    def try_leave_early(self):
+        """Claim an early exit; refused when this draft is the last one that could finish."""
+        with self._lock:
+            if self.running > 1 or self.complete:
+                self.running -= 1
+                return True
+            return False
+
+    def done(self, complete, left_early):
+        with self._lock:
+            self.complete += complete
+            self.running -= not left_early
+
+
+def _run_draft(index, prompt, temperature, seed, stop, results, emit, board):
+    """Stream one draft, checking the rules as tokens arrive; always puts one result.
+
+    A placeholder or ``stop`` ends the stream early, and so does going over LETTER_MAX_WORDS
+    when ``board`` says another draft can still finish; such results have ``complete`` False.
+    """
+    started = time.perf_counter()
+    left_early = False
+    parts, words, in_word, line = [], 0, False, ""
+    result = {"draft": index, "temperature": temperature, "seed": seed, "status": "ok", "problems": [],
+              "complete": False}
+    try:
+        if stop.is_set():
+            result["status"] = "cancelled"
+            return
+        stream = generate(prompt, temperature=temperature, stream=True, options={"seed": seed})
+        try:
+            for chunk in stream:
+                if stop.is_set():
+                    result["status"] = "cancelled"
+                    break
+                token = chunk["response"]
+                if not token:
+                    continue
+                parts.append(token)
+                emit(index, token)
+                # Incremental word count: a token continuing the previous word adds one less
+                pieces = token.split()
+                if pieces:
+                    words += len(pieces) - (1 if in_word and not token[0].isspace() else 0)
+                in_word = not token[-1].isspace()
+                if words > LETTER_MAX_WORDS and not left_early and board.try_leave_early():
+                    left_early = True
+                    result["status"], result["problems"] = "rejected", [f"over {LETTER_MAX_WORDS} words"]
+                    break
+
+                # Bracketed forms can be spotted mid-line, bare ones once their line is finished
+                match = _PLACEHOLDER.search("".join(parts[-24:]))
+                placeholder = match.group(0) if match else None
+                line += token
+                if "\n" in line:
+                    finished_lines, line = line.rsplit("\n", 1)
+                    placeholder = placeholder or _find_placeholder(finished_lines)
+                if placeholder:
+                    result["status"], result["problems"] = "rejected", [f"placeholder {placeholder!r}"]
+                    break
+        finally:
+            # Closing the stream drops the HTTP connection, which stops Ollama generating
+            stream.close()
+        if result["status"] == "ok":
+            result["complete"] = True
+            result["problems"] = validate_letter("".join(parts))
+            if result["problems"]:
+                result["status"] = "rejected"
+    except Exception as e:
+        result["status"], result["problems"] = "error", [str(e)]
+    finally:
+        board.done(result["complete"], left_early)
+        result["text"] = "".join(parts)
+        result["words"] = len(result["text"].split())
+        result["seconds"] = time.perf_counter() - started
+        results.put(result)
+
+
+def _draft_rank(result):
+    """Fallback order among complete drafts when none passes: placeholder-free, closest to the word range."""
+    words = result["words"]
+    distance = max(LETTER_MIN_WORDS - words, words - LETTER_MAX_WORDS, 0)
+    placeholder = any(p.startswith("placeholder") for p in result["problems"])
+    return placeholder, distance
+
+
+def generate_cover_letter_drafts(resume_text: str, job_description: str, drafts: int = 3, on_token=None,
+                                 on_reset=None, token_budget=PROMPT_TOKEN_BUDGET, seed: int = None) -> dict:
+    """Generate ``drafts`` letters concurrently and return the first that passes validate_letter().
+
+    Each draft uses its own temperature and seed. A draft is stopped as soon as it writes a
+    placeholder, or goes over LETTER_MAX_WORDS unless it is the only one left that could
+    finish, and the others are stopped once one passes. ``on_token`` streams the first
+    draft to produce text; if a different draft wins, ``on_reset(text)`` receives the winning
+    letter. If none passes, the closest complete draft is returned with ``passed`` False and
+    its ``problems``; RuntimeError if no draft finished. Returns letter, draft, temperature,
+    seed, words, passed, problems and a per-draft summary under "drafts".
+    """
+    prompt = _cover_letter_prompt(resume_text, job_description, token_budget)
+    base_seed = int(time.time()) if seed is None else seed
+    stop = threading.Event()
+    results = queue.Queue()
+    leader = []
+    leader_lock = threading.Lock()
+    board = _DraftBoard(drafts)
+
+    def emit(index, token):
+        if on_token is None:
+            return
+        if not leader:
+            with leader_lock:
+                if not leader:
+                    leader.append(index)
+        if leader[0] == index and not stop.is_set():
+            on_token(token)
+
+    for i in range(drafts):
+        _draft_pool.submit(_run_draft, i, prompt, DRAFT_TEMPERATURES[i % len(DRAFT_TEMPERATURES)],
+                           base_seed + i, stop, results, emit, board)
+
+    finished, winner = [], None
+    while len(finished) < drafts:
+        result = results.get()
+        finished.append(result)
+        if result["status"] == "ok":
+            winner = result
+            break
+    stop.set()
+
+    if winner is None:
+        complete = [r for r in finished if r["complete"] and r["text"]]
+        if not complete:
+            problems = [p for r in finished for p in r["problems"]] or ["no text"]
+            raise RuntimeError(f"No complete draft out of {drafts}: {problems[0]}")
+        winner = min(complete, key=_draft_rank)
+    if on_reset is not None and leader and leader[0] != winner["draft"]:
+        on_reset(winner["text"])
+
+    return {
+        "letter": winner["text"],
+        "draft": winner["draft"],
+        "temperature": winner["temperature"],
+        "seed": winner["seed"],
+        "words": winner["words"],
+        "passed": winner["status"] == "ok",
+        "problems": winner["problems"],
+        "drafts": [{key: r[key] for key in ("draft", "temperature", "status", "words", "problems", "seconds")}
+                   for r in finished],
+    }
+
+
+# ==================== SAVE DOCX / PDF ====================
+@tracing.traced("render.docx")
 def save_as_docx(text: str, filepath: str):
-    doc = OutDocx()
-    style = doc.styles['Normal']
-    style.font.name = 'Calibri'
-    style.font.size = Pt(11)
-
-    for line in text.split("\n"):
-        line = line.strip()
-        if not line:
-            continue
-        p = doc.add_paragraph(line)
-        if "@" in line or re.match(r"[\d\s\-\(\)]{8,}", line) or len(line) < 60:
-            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            p.runs[0].bold = True
-            p.space_after = Pt(12)
-        else:
-            p.space_after = Pt(8)
-    doc.save(filepath)
+    render_docx(classify_lines(text), filepath)
 
 
-# ==================== SAVE PDF ====================
+@tracing.traced("render.pdf")
 def save_as_pdf(text: str, filepath: str):
-    doc = SimpleDocTemplate(filepath, pagesize=letter,
-                            rightMargin=72, leftMargin=72,
-                            topMargin=80, bottomMargin=72)
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='CenterBold',
-                             parent=styles['Normal'],
-                             alignment=1,
-                             fontSize=11,
-                             spaceAfter=12,
-                             fontName='Helvetica-Bold'))
-
-    story = []
-    for line in text.split("\n"):
-        line = line.strip()
-        if not line:
-            story.append(Spacer(1, 6))
-            continue
-        if "@" in line or re.match(r"[\d\s\-\(\)]{8,}", line) or len(line) < 60:
-            story.append(Paragraph(line, styles['CenterBold']))
-        else:
-            story.append(Paragraph(line, styles['Normal']))
-        story.append(Spacer(1, 6))
-    doc.build(story)
+    render_pdf(classify_lines(text), filepath)
+
+
+def save_letter(text: str, docx_path: str, pdf_path: str) -> dict:
+    """Write both formats in parallel; returns {"docx": seconds, "pdf": seconds}."""
+    timings = default_renderer().render(text, docx_path, pdf_path)
+    # The PDF is built in a worker process, so record the times measured there
+    for fmt, seconds in timings.items():
+        tracing.record(f"render.{fmt}", seconds)
+    return timings
+
+
+# ==================== WARM-UP ====================
+def warm_up(on_status=None):
+    """Import the document and Ollama libraries ahead of the first click (run on a thread).
+
+    Failures are left for first use to report; ``on_status`` gets a one-line summary.
+    """
+    started = time.perf_counter()
+    failed = []
+    for name, step in (("docx", lambda: __import__("docx")), ("PyPDF2", lambda: __import__("PyPDF2")),
+                       ("renderer", warm_up_renderer), ("ollama", get_client)):
+        try:
+            step()
+        except Exception:
+            failed.append(name)
+    if on_status is not None:
+        note = f" ({', '.join(failed)} will load on first use)" if failed else ""
+        on_status(f"Ready – {ollama_settings['model']} loaded in {time.perf_counter() - started:.1f}s{note}")
+
+
+# ==================== PIPELINE ====================
+# Leaf tasks only (nothing submitted here submits back), so a shared pool cannot deadlock.
+# One company detection per running pipeline: size it to the number of concurrent pipelines.
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", 8))
+_pipeline_pool = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="cover-letter")
+
+
+def configure_pipeline_pool(workers: int):
+    """Resize the shared pool for ``workers`` concurrent pipelines (call before starting them)."""
+    global _pipeline_pool
+    old, _pipeline_pool = _pipeline_pool, ThreadPoolExecutor(max_workers=max(1, workers),
+                                                             thread_name_prefix="cover-letter")
+    old.shutdown(wait=False)
+
+
+class PipelineError(Exception):
+    """A pipeline stage failed; ``stage`` names it and ``__cause__`` holds the original error."""
+
+    def __init__(self, stage, error):
+        super().__init__(f"{stage}: {error}")
+        self.stage = stage
+
+
+def _timed(timings, stage, fn, *args):
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    except Exception as e:
+        raise PipelineError(stage, e) from e
+    finally:
+        timings[stage] = time.perf_counter() - started
+
+
+def output_base_name(resume_path, company_name):
+    resume_name = os.path.splitext(os.path.basename(resume_path))[0]
+    safe_company = re.sub(r'[^\w\-_]', '_', company_name)
+    return f"cover_letter_{resume_name}_{safe_company}"
+
+
+@tracing.traced("pipeline")
+def run_pipeline(job_desc, resume_path=None, resume_text=None, out_dir=None, base_name=None,
+                 on_status=None, on_token=None, drafts=None, on_reset=None):
+    """Resume → cover letter → DOCX + PDF with independent stages overlapped.
+
+    Company detection runs while the resume is read and the letter is generated
+    (only the file name depends on it), and DOCX and PDF are rendered together.
+    Pass ``resume_text`` to skip reading, ``base_name`` to fix the output name and
+    ``on_token`` to stream the letter (adds a "first_token" timing). ``drafts`` (default
+    LETTER_DRAFTS) > 1 races that many drafts; ``on_reset`` then receives the winning
+    text if it is not the one that was streamed. Returns
+    company, letter, whether it ``passed`` validate_letter() and its ``problems``, file
+    paths, per-stage ``timings``, prompt ``tokens_saved`` and wall ``total`` in seconds;
+    a failing stage raises PipelineError.
+    """
+    status = on_status or (lambda message: None)
+    timings = {}
+    started = time.perf_counter()
+
+    status("Detecting company name and generating cover letter...")
+    company_future = _pipeline_pool.submit(_timed, timings, "detect", detect_company_name, job_desc)
+    if resume_text is None:
+        resume_text = _timed(timings, "read", extract_text_from_file, resume_path, True, RESUME_MAX_CHARS or None)
+    compacted = _timed(timings, "compact", compact_prompt_inputs, resume_text, job_desc, PROMPT_TOKEN_BUDGET)
+    status(f"Prompt compacted: {compacted['tokens_saved']} tokens saved")
+    resume_text, letter_job = compacted["resume"], compacted["job"]
+
+    drafts = drafts or LETTER_DRAFTS
+    on_token_timed = None
+    if on_token is not None:
+        generate_started = time.perf_counter()
+
+        def on_token_timed(token):
+            if "first_token" not in timings:
+                timings["first_token"] = time.perf_counter() - generate_started
+            on_token(token)
+
+    if drafts > 1:
+        status(f"Generating {drafts} drafts, keeping the first that fits {LETTER_MIN_WORDS}–{LETTER_MAX_WORDS} words...")
+        outcome = _timed(timings, "generate", generate_cover_letter_drafts, resume_text, letter_job,
+                         drafts, on_token_timed, on_reset, None)
+        cover_letter, problems = outcome["letter"], outcome["problems"]
+    else:
+        cover_letter = _timed(timings, "generate", generate_cover_letter, resume_text, letter_job,
+                              on_token_timed, None)
+        problems = validate_letter(cover_letter)
+    company_name = company_future.result()
+
+    if base_name is None:
+        base_name = output_base_name(resume_path or "resume", company_name)
+    out_dir = out_dir or os.getcwd()
+    docx_path = os.path.join(out_dir, f"{base_name}.docx")
+    pdf_path = os.path.join(out_dir, f"{base_name}.pdf")
+
+    status(f"Saving DOCX + PDF for {company_name}...")
+    timings.update(_timed(timings, "render", save_letter, cover_letter, docx_path, pdf_path))
+
+    return {
+        "company": company_name,
+        "letter": cover_letter,
+        "passed": not problems,
+        "problems": problems,
+        "docx": docx_path,
+        "pdf": pdf_path,
+        "timings": timings,
+        "tokens_saved": compacted["tokens_saved"],
+        "total": time.perf_counter() - started,
+    }
 
 
 class CoverLetterApp:
     def __init__(self, master):
         self.master = master
-        master.title("Auto Cover Letter Generator — gemma3:4b")
-        master.geometry("920x760")
+        master.title(f"Auto Cover Letter Generator — {ollama_settings['model']}")
+        master.geometry("920x900")
         master.resizable(True, True)
 
         tk.Label(master, text="1. Select Your Resume", font=("Arial", 12, "bold")).pack(anchor="w", padx=25, pady=(25,8))
@@ -156,19 +680,24 @@ class CoverLetterApp:
         tk.Button(rframe, text="Browse Resume", command=self.browse).pack(side="right")
 
         tk.Label(master, text="2. Paste Full Job Description", font=("Arial", 12, "bold")).pack(anchor="w", padx=25, pady=(20,8))
-        self.job_box = scrolledtext.ScrolledText(master, height=14, wrap=tk.WORD, font=("Segoe UI", 10))
+        self.job_box = scrolledtext.ScrolledText(master, height=10, wrap=tk.WORD, font=("Segoe UI", 10))
         self.job_box.pack(fill="both", expand=True, padx=25, pady=5)
 
         self.gen_btn = tk.Button(master, text="Generate Cover Letter (DOCX + PDF)", font=("Arial", 14, "bold"),
                                  bg="#006400", fg="white", height=2, command=self.start)
-        self.gen_btn.pack(pady=30)
+        self.gen_btn.pack(pady=20)
 
-        self.status = tk.StringVar(value="Ready – gemma3:4b loaded")
+        self.status = tk.StringVar(value=f"Ready – {ollama_settings['model']} loaded")
         tk.Label(master, textvariable=self.status, fg="#006400", font=("Arial", 11)).pack(fill="x", padx=25)
 
         self.progress = ttk.Progressbar(master, mode='indeterminate')
         self.progress.pack(fill="x", padx=25, pady=10)
 
+        tk.Label(master, text="3. Cover Letter (live)", font=("Arial", 12, "bold")).pack(anchor="w", padx=25, pady=(10,8))
+        self.letter_box = scrolledtext.ScrolledText(master, height=12, wrap=tk.WORD, font=("Segoe UI", 10),
+                                                    state="disabled")
+        self.letter_box.pack(fill="both", expand=True, padx=25, pady=(5,25))
+
     def browse(self):
         path = filedialog.askopenfilename(filetypes=[("Documents", "*.docx *.pdf *.txt")])
         if path:
@@ -188,38 +717,47 @@ class CoverLetterApp:
 
         self.gen_btn.config(state="disabled")
         self.progress.start()
+        self.letter_box.config(state="normal")
+        self.letter_box.delete("1.0", tk.END)
+        self.letter_box.config(state="disabled")
         threading.Thread(target=self.worker, args=(resume_path, job_desc), daemon=True).start()
 
-    def worker(self, resume_path, job_desc):
-        try:
-            self.master.after(0, lambda: self.status.set("Reading resume..."))
-            resume_text = extract_text_from_file(resume_path)
-
-            self.master.after(0, lambda: self.status.set("Detecting company name from job post..."))
-            company_name = detect_company_name(job_desc)
-            self.master.after(0, lambda: self.status.set(f"Company detected: {company_name}"))
-
-            self.master.after(0, lambda: self.status.set("Generating cover letter with gemma3:4b..."))
-            cover_letter = generate_cover_letter(resume_text, job_desc)
-
-            resume_name = os.path.splitext(os.path.basename(resume_path))[0]
-            safe_company = re.sub(r'[^\w\-_]', '_', company_name)
-            base_name = f"cover_letter_{resume_name}_{safe_company}"
+    def show_ready(self, message):
+        """Warm-up result; ignored once the user has moved on."""
+        if self.status.get().startswith("Ready"):
+            self.status.set(message)
 
-            docx_path = os.path.join(os.getcwd(), f"{base_name}.docx")
-            pdf_path = os.path.join(os.getcwd(), f"{base_name}.pdf")
+    def append_token(self, token):
+        self.letter_box.config(state="normal")
+        self.letter_box.insert(tk.END, token)
+        self.letter_box.see(tk.END)
+        self.letter_box.config(state="disabled")
 
-            self.master.after(0, lambda: self.status.set("Saving DOCX..."))
-            save_as_docx(cover_letter, docx_path)
+    def replace_letter(self, text):
+        """Show a different draft than the one streamed (multi-draft mode)."""
+        self.letter_box.config(state="normal")
+        self.letter_box.delete("1.0", tk.END)
+        self.letter_box.insert(tk.END, text)
+        self.letter_box.config(state="disabled")
 
-            self.master.after(0, lambda: self.status.set("Saving PDF..."))
-            save_as_pdf(cover_letter, pdf_path)
-
-            self.master.after(0, lambda: self.status.set(f"Done! Generated 2 files → {company_name}"))
+    def worker(self, resume_path, job_desc):
+        try:
+            result = run_pipeline(job_desc, resume_path=resume_path, out_dir=os.getcwd(),
+                                  on_status=lambda message: self.master.after(0, self.status.set, message),
+                                  on_token=lambda token: self.master.after(0, self.append_token, token),
+                                  on_reset=lambda text: self.master.after(0, self.replace_letter, text))
+            company_name = result["company"]
+            docx_path, pdf_path = result["docx"], result["pdf"]
+            stage_times = ", ".join(f"{stage} {secs:.1f}s" for stage, secs in result["timings"].items())
+
+            review = "" if result["passed"] else f"\n\nPlease review: {'; '.join(result['problems'])}"
+            done = "Done! Generated 2 files" if result["passed"] else "Done, needs review"
+            self.master.after(0, lambda: self.status.set(
+                f"{done} → {company_name} in {result['total']:.1f}s ({stage_times})"))
             messagebox.showinfo("Success!",
                                 f"Cover letter generated for {company_name}!\n\n"
                                 f"• {os.path.basename(docx_path)}\n"
-                                f"• {os.path.basename(pdf_path)}")
+                                f"• {os.path.basename(pdf_path)}{review}")
 
             folder = os.path.dirname(docx_path)
             os.startfile(folder) if os.name == "nt" else None
@@ -235,4 +773,8 @@ class CoverLetterApp:
 if __name__ == "__main__":
     root = tk.Tk()
     app = CoverLetterApp(root)
+    # Once the window has been drawn, load the heavy libraries in the background
+    warm_status = lambda message: root.after(0, app.show_ready, message)
+    root.after_idle(lambda: threading.Thread(target=warm_up, args=(warm_status,), daemon=True,
+                                             name="warm-up").start())
     root.mainloop()
@@ -0,0 +1,134 @@
+# disk_cache.py
+# Small persistent key → text cache with size-bounded LRU eviction.
+#
+# Each entry is one file named after its key; reads bump the file's mtime so the
+# oldest mtime is always the least recently used entry. Writes are atomic
+# (temp file + os.replace) so concurrent processes never see half-written entries.
+import hashlib
+import os
+import tempfile
+import threading
+
+CACHE_ROOT = os.environ.get(
+    "AUTOMATION_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "automation_scripts"),
+)
+
+
+def content_key(*parts) -> str:
+    """sha256 hex digest of the given str/bytes parts (order-sensitive)."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8") if isinstance(part, str) else part)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """sha256 hex digest of a file's bytes, read in blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class DiskCache:
+    def __init__(self, name: str, max_bytes: int = 64 * 1024 * 1024, root: str = None):
+        self.directory = os.path.join(root or CACHE_ROOT, name)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = None  # running estimate, computed lazily on first write
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str):
+        """Return the cached text for ``key`` or None."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: str):
+        os.makedirs(self.directory, exist_ok=True)
+        data = value.encode("utf-8")
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def clear(self):
+        with self._lock:
+            for entry in self._entries():
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            self._size = 0
+
+    def _entries(self):
+        try:
+            return [e for e in os.scandir(self.directory) if e.is_file() and not e.name.startswith(".tmp-")]
+        except OSError:
+            return []
+
+    def _scan_size(self) -> int:
+        return sum(e.stat().st_size for e in self._entries())
+
+    def _evict(self):
+        entries = []
+        for e in self._entries():
+            try:
+                st = e.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, e.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries()),
+                "bytes": self._scan_size(),
+                "max_bytes": self.max_bytes,
+            }
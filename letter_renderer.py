@@ -0,0 +1,174 @@
+# letter_renderer.py
+# DOCX + PDF rendering for generated cover letters.
+#
+# Lines are classified once and shared by both formats, styles and the base DOCX are
+# built once per process, and PDFs are built in a process pool (ReportLab is pure
+# Python and holds the GIL) while the DOCX is written on the calling thread.
+# python-docx and ReportLab are imported on first render (or by warm_up()), so importing
+# this module is cheap.
+import io
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+BLANK, HEADING, BODY = "blank", "heading", "body"
+
+# Name / phone / address lines: digits, spaces, dashes and parentheses
+_CONTACT_LINE = re.compile(r"[\d\s\-\(\)]{8,}")
+
+
+def classify_lines(text: str):
+    """Return [(kind, line)] with kind BLANK, HEADING (centered bold) or BODY."""
+    lines = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            lines.append((BLANK, ""))
+        elif "@" in line or len(line) < 60 or _CONTACT_LINE.match(line):
+            lines.append((HEADING, line))
+        else:
+            lines.append((BODY, line))
+    return lines
+
+
+# ==================== DOCX ====================
+@lru_cache(maxsize=1)
+def _docx_template() -> bytes:
+    """A blank document with the letter's Normal style, serialized once."""
+    from docx import Document as OutDocx
+    from docx.shared import Pt
+    doc = OutDocx()
+    style = doc.styles['Normal']
+    style.font.name = 'Calibri'
+    style.font.size = Pt(11)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def render_docx(lines, filepath: str) -> float:
+    from docx import Document as OutDocx
+    from docx.shared import Pt
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    started = time.perf_counter()
+    doc = OutDocx(io.BytesIO(_docx_template()))
+    heading_space, body_space = Pt(12), Pt(8)
+    for kind, line in lines:
+        if kind == BLANK:
+            continue
+        p = doc.add_paragraph(line)
+        if kind == HEADING:
+            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            p.runs[0].bold = True
+            p.paragraph_format.space_after = heading_space
+        else:
+            p.paragraph_format.space_after = body_space
+    doc.save(filepath)
+    return time.perf_counter() - started
+
+
+# ==================== PDF ====================
+@lru_cache(maxsize=1)
+def _pdf_styles():
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='CenterBold',
+                              parent=styles['Normal'],
+                              alignment=1,
+                              fontSize=11,
+                              spaceAfter=12,
+                              fontName='Helvetica-Bold'))
+    return styles['CenterBold'], styles['Normal']
+
+
+def render_pdf(lines, filepath: str) -> float:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    started = time.perf_counter()
+    heading_style, body_style = _pdf_styles()
+    doc = SimpleDocTemplate(filepath, pagesize=letter,
+                            rightMargin=72, leftMargin=72,
+                            topMargin=80, bottomMargin=72)
+    story = []
+    for kind, line in lines:
+        if kind != BLANK:
+            # Paragraph parses mini-markup, so "&" or "<" in a letter must be escaped
+            story.append(Paragraph(escape(line), heading_style if kind == HEADING else body_style))
+        story.append(Spacer(1, 6))
+    doc.build(story)
+    return time.perf_counter() - started
+
+
+def warm_up():
+    """Import python-docx and ReportLab and build the cached template and styles."""
+    _docx_template()
+    _pdf_styles()
+
+
+# ==================== RENDERER ====================
+class LetterRenderer:
+    """Renders letters to DOCX and PDF in parallel; pools are created on first use.
+
+    ``pdf_workers`` = 0 builds PDFs on a thread instead of a process pool (no process
+    start-up cost, but no parallelism with other ReportLab work).
+    """
+
+    def __init__(self, pdf_workers: int = None):
+        self.pdf_workers = min(4, os.cpu_count() or 1) if pdf_workers is None else pdf_workers
+        self._pdf_pool = None
+        self._thread_pool = None
+        self._lock = threading.Lock()
+
+    def _pools(self):
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="letter-render")
+                if self.pdf_workers > 0:
+                    self._pdf_pool = ProcessPoolExecutor(max_workers=self.pdf_workers)
+        return self._pdf_pool or self._thread_pool, self._thread_pool
+
+    def submit(self, text: str, docx_path: str, pdf_path: str):
+        """Start rendering one letter; returns (docx_future, pdf_future) of elapsed seconds."""
+        pdf_pool, docx_pool = self._pools()
+        lines = classify_lines(text)
+        return docx_pool.submit(render_docx, lines, docx_path), pdf_pool.submit(render_pdf, lines, pdf_path)
+
+    def render(self, text: str, docx_path: str, pdf_path: str) -> dict:
+        """Render one letter to both formats; returns {"docx": s, "pdf": s}."""
+        pdf_pool, _ = self._pools()
+        lines = classify_lines(text)
+        pdf_future = pdf_pool.submit(render_pdf, lines, pdf_path)
+        docx_s = render_docx(lines, docx_path)
+        return {"docx": docx_s, "pdf": pdf_future.result()}
+
+    def render_many(self, letters):
+        """Render [(text, docx_path, pdf_path)] with every file in flight at once."""
+        futures = [self.submit(*item) for item in letters]
+        return [{"docx": d.result(), "pdf": p.result()} for d, p in futures]
+
+    def close(self):
+        with self._lock:
+            self._shutdown()
+
+    def _shutdown(self):
+        if self._pdf_pool is not None:
+            self._pdf_pool.shutdown()
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown()
+        self._pdf_pool = self._thread_pool = None
+
+
+_default_renderer = None
+_default_lock = threading.Lock()
+
+
+def default_renderer() -> LetterRenderer:
+    global _default_renderer
+    with _default_lock:
+        if _default_renderer is None:
+            _default_renderer = LetterRenderer()
+        return _default_renderer
@@ -0,0 +1,200 @@
+# conversation.py
+# Persistent multi-turn history for the MCP client with a token budget.
+#
+# Finished turns are appended to the store; tool outputs over tool_inline_limit
+# characters are moved to side files and replaced by a short reference with the head
+# and tail of the output; the model can page through the rest with the read_ref tool
+# (READ_REF_TOOL, answered locally by the client). When the history no longer fits
+# token_budget, the oldest turns are folded into a running summary. Sessions are saved
+# as JSON so a restarted client picks up where it left off.
+import json
+import os
+import re
+import shutil
+import tempfile
+import uuid
+
+from disk_cache import CACHE_ROOT
+from text_compaction import estimate_tokens
+
+SESSIONS_DIR = os.environ.get("MCP_SESSIONS_DIR", os.path.join(CACHE_ROOT, "mcp_sessions"))
+_SAFE_ID = re.compile(r"[^\w\-]")
+# Characters of an externalized tool output kept inline (split between head and tail)
+# and returned per read_ref call
+REF_EXCERPT_CHARS = 600
+REF_PAGE_CHARS = 4000
+
+# Ollama tool schema for ConversationStore.read_ref_tool()
+READ_REF_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "read_ref",
+        "description": f"Read a stored tool output by its ref id, {REF_PAGE_CHARS} characters at a time "
+                       f"starting at offset.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "ref": {"type": "string", "description": "The ref id from the stored-output note"},
+                "offset": {"type": "integer", "description": "Character offset to start from (default 0)"},
+            },
+            "required": ["ref"],
+        },
+    },
+}
+
+
+def _plain_message(message) -> dict:
+    """Ollama Message objects (or dicts) → JSON-serializable dicts."""
+    plain = {"role": message["role"], "content": message.get("content") or ""}
+    if message.get("name"):
+        plain["name"] = message["name"]
+    tool_calls = message.get("tool_calls")
+    if tool_calls:
+        plain["tool_calls"] = [
+            {"function": {"name": call["function"]["name"], "arguments": dict(call["function"]["arguments"])}}
+            for call in tool_calls
+        ]
+    return plain
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def extractive_summary(previous: str, turn) -> str:
+    """Default summarizer: keep the question and the final answer of each folded turn."""
+    question = next((m["content"] for m in turn if m["role"] == "user"), "")
+    answer = next((m["content"] for m in reversed(turn) if m["role"] == "assistant" and m["content"]), "")
+    tools = sorted({m.get("name", "tool") for m in turn if m["role"] == "tool"})
+    line = f"- User asked: {_clip(question, 200)}"
+    if tools:
+        line += f" (tools: {', '.join(tools)})"
+    if answer:
+        line += f" → Assistant: {_clip(answer, 300)}"
+    return f"{previous}\n{line}".strip()
+
+
+class ConversationStore:
+    def __init__(self, session_id: str = "default", directory: str = SESSIONS_DIR,
+                 token_budget: int = 3000, keep_recent_turns: int = 2,
+                 tool_inline_limit: int = 2000, summarize=extractive_summary):
+        self.session_id = _SAFE_ID.sub("_", session_id)
+        self.directory = os.path.join(directory, self.session_id)
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.tool_inline_limit = tool_inline_limit
+        self.summarize = summarize
+        self.summary = ""
+        self.turns = []  # list of turns; a turn is the list of messages after one user query
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, "session.json")
+
+    # ---------- persistence ----------
+    @classmethod
+    def load(cls, session_id: str = "default", **kwargs):
+        """Open a saved session, or start an empty one if there is none."""
+        store = cls(session_id, **kwargs)
+        try:
+            with open(store.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return store
+        store.summary = data.get("summary", "")
+        store.turns = data.get("turns", [])
+        return store
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".session-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"session_id": self.session_id, "summary": self.summary, "turns": self.turns}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        self.summary = ""
+        self.turns = []
+        shutil.rmtree(os.path.join(self.directory, "refs"), ignore_errors=True)
+        self.save()
+
+    # ---------- tool outputs by reference ----------
+    def _store_ref(self, content: str) -> str:
+        ref_id = uuid.uuid4().hex[:12]
+        refs = os.path.join(self.directory, "refs")
+        os.makedirs(refs, exist_ok=True)
+        with open(os.path.join(refs, f"{ref_id}.txt"), "w", encoding="utf-8") as f:
+            f.write(content)
+        return ref_id
+
+    def read_ref(self, ref_id: str) -> str:
+        with open(os.path.join(self.directory, "refs", f"{_SAFE_ID.sub('_', ref_id)}.txt"), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def read_ref_tool(self, arguments) -> str:
+        """Answer a read_ref tool call: one page of a stored output, or an error the model can read."""
+        ref_id = str(arguments.get("ref", ""))
+        try:
+            offset = max(0, int(arguments.get("offset") or 0))
+            content = self.read_ref(ref_id)
+        except (OSError, TypeError, ValueError):
+            return f"Error: no stored output with ref {ref_id!r}"
+        page = content[offset:offset + REF_PAGE_CHARS]
+        end = offset + len(page)
+        if end < len(content):
+            page += f"\n[chars {offset}-{end} of {len(content)}; call read_ref with offset={end} for more]"
+        return page
+
+    def _externalize(self, message: dict) -> dict:
+        content = message["content"]
+        if message["role"] != "tool" or len(content) <= self.tool_inline_limit:
+            return message
+        half = REF_EXCERPT_CHARS // 2
+        message = dict(message)
+        if message.get("name") == "read_ref":
+            # Already stored: keep the excerpt, not a second copy
+            message["content"] = f"{content[:half]}\n…\n[page of a stored output; call read_ref again to see it]"
+            return message
+        ref_id = self._store_ref(content)
+        message["content"] = (f"{content[:half]}\n…\n{content[-half:]}\n"
+                              f"[{len(content)} chars of tool output stored as ref {ref_id}; only the start "
+                              f"and end are shown, call read_ref(ref=\"{ref_id}\") for the rest]")
+        return message
+
+    # ---------- history ----------
+    def add_turn(self, messages):
+        """Record one finished turn (the user message and everything after it)."""
+        turn = [self._externalize(_plain_message(m)) for m in messages]
+        self.turns.append(turn)
+        self.compact()
+
+    @staticmethod
+    def _message_tokens(message) -> int:
+        # Tool call arguments are sent back to the model too, so they count against the budget
+        tokens = estimate_tokens(message["content"]) + 4
+        if message.get("tool_calls"):
+            tokens += estimate_tokens(json.dumps(message["tool_calls"]))
+        return tokens
+
+    def _tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(self._message_tokens(m) for turn in self.turns for m in turn)
+
+    def compact(self):
+        """Fold the oldest turns into the summary until the history fits the budget."""
+        while len(self.turns) > self.keep_recent_turns and self._tokens() > self.token_budget:
+            self.summary = self.summarize(self.summary, self.turns.pop(0))
+        # The summary itself may outgrow the budget; keep its most recent half
+        limit = self.token_budget // 2
+        if estimate_tokens(self.summary) > limit:
+            self.summary = self.summary[-limit * 4:].split("\n", 1)[-1]
+
+    def context(self, system_prompt: str):
+        """Messages to send before the next user query: system (+ summary) and recent turns."""
+        system = system_prompt
+        if self.summary:
+            system += "\n\nEarlier in this conversation:\n" + self.summary
+        messages = [{"role": "system", "content": system}]
+        for turn in self.turns:
+            messages.extend(turn)
+        return messages
@@ -1,104 +1,160 @@
 # mcp_client.py
+import argparse
 import asyncio
-import ollama
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-
-
-OLLAMA_MODEL = "llama3.2:latest"   
-
-async def run_client():
-    # Launch the MCP server as a subprocess
+import os
+import sys
+from mcp import StdioServerParameters
+
+from mcp_session import McpSessionManager
+
+# Shared Ollama client layer lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ollama_client import chat
+from conversation import READ_REF_TOOL, ConversationStore
+import tracing
+
+
+OLLAMA_MODEL = os.environ.get("MCP_OLLAMA_MODEL", "llama3.2:latest")
+# Agent loop limits: tool-use rounds per query, seconds per tool call, parallel tool calls
+MAX_STEPS = int(os.environ.get("MCP_MAX_STEPS", 5))
+TOOL_TIMEOUT = float(os.environ.get("MCP_TOOL_TIMEOUT", 30))
+TOOL_CONCURRENCY = int(os.environ.get("MCP_TOOL_CONCURRENCY", 4))
+# Tokens of history (summary + recent turns) carried into each query
+HISTORY_TOKEN_BUDGET = int(os.environ.get("MCP_HISTORY_TOKENS", 3000))
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_server.py")
+
+SYSTEM_PROMPT = (
+    "You are a helpful, precise assistant with access to tools. "
+    "Always use the 'current_time' tool when asked for the time or date. "
+    "Use 'add' or 'multiply' for math. Use file tools for reading/writing files. "
+    "Never guess the time — always call the tool."
+)
+
+
+async def call_tool_text(manager, name, arguments, timeout=TOOL_TIMEOUT):
+    """Call one tool and return its text output; errors and timeouts become the tool's answer."""
+    with tracing.span("mcp.call_tool", tool=name) as span:
+        try:
+            result = await asyncio.wait_for(manager.call_tool(name, arguments), timeout)
+        except asyncio.TimeoutError:
+            span.fail(f"timed out after {timeout}s")
+            return f"Error: tool '{name}' timed out after {timeout}s"
+        except Exception as e:
+            span.fail(e)
+            return f"Error: tool '{name}' failed: {e}"
+        if result.isError:
+            span.fail("tool reported an error")
+
+    # Extract text content from the result
+    content_text = "".join(part.text for part in result.content or [] if part.type == "text")
+    return content_text or "Tool executed (no text output)"
+
+
+async def run_agent(manager, messages, tool_schemas, max_steps=MAX_STEPS,
+                    tool_timeout=TOOL_TIMEOUT, max_concurrency=TOOL_CONCURRENCY, log=print, local_tools=None):
+    """Let the model call tools for up to ``max_steps`` rounds and return its final answer.
+
+    Each round's tool calls run concurrently (at most ``max_concurrency`` at a time, each
+    bounded by ``tool_timeout``), and the assistant message that requested them is added
+    to ``messages`` once, followed by one tool message per call in request order.
+    ``local_tools`` maps tool names answered in the client (e.g. read_ref) to a function
+    of the call's arguments; their schemas must already be in ``tool_schemas``.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    local_tools = local_tools or {}
+
+    async def run_call(tool_call):
+        func_name = tool_call["function"]["name"]
+        args = tool_call["function"]["arguments"]
+        log(f"\n🔧 Using tool: {func_name} with args → {args}")
+        if func_name in local_tools:
+            return local_tools[func_name](args or {})
+        async with semaphore:
+            return await call_tool_text(manager, func_name, args, tool_timeout)
+
+    for _ in range(max_steps):
+        response = await asyncio.to_thread(chat, model=OLLAMA_MODEL, messages=messages, tools=tool_schemas)
+        message = response["message"]
+        messages.append(message)
+        tool_calls = message.get("tool_calls") or []
+        if not tool_calls:
+            return message.get("content", "")
+
+        if message.get("content"):
+            log(f"\nAssistant: {message['content']}")
+        results = await asyncio.gather(*(run_call(tool_call) for tool_call in tool_calls))
+        for tool_call, content_text in zip(tool_calls, results):
+            messages.append({
+                "role": "tool",
+                "content": content_text,
+                "name": tool_call["function"]["name"]
+            })
+
+    # Step budget used up: ask for an answer from what the tools returned so far
+    response = await asyncio.to_thread(chat, model=OLLAMA_MODEL, messages=messages)
+    messages.append(response["message"])
+    return response["message"].get("content", "")
+
+
+async def run_client(session_id="default", new_session=False):
+    # Launch the MCP server as a subprocess; the manager keeps it alive across queries
+    # and restarts it with backoff if it crashes
     server_params = StdioServerParameters(
-        command="python",
-        args=["mcp_server.py"]
+        command=sys.executable,
+        args=[SERVER_SCRIPT]
     )
 
-    async with stdio_client(server_params) as (read_stream, write_stream):
-        async with ClientSession(read_stream, write_stream) as session:
-            await session.initialize()
-
-            # Discover all available tools
-            tools_response = await session.list_tools()
-            tools = tools_response.tools
-
-            print("\n=== Connected to MCP Server ===")
-            print(f"Available tools ({len(tools)}):")
-            for tool in tools:
-                print(f"  • {tool.name} — {tool.description}")
-            print("=" * 40)
-
-            while True:
-                user_query = input("\nEnter your query (or 'quit' to exit): ").strip()
-                if user_query.lower() in {"quit", "exit", "bye"}:
-                    print("Goodbye!")
-                    break
-                if not user_query:
-                    continue
-
-                # Message history for Ollama
-                messages = [
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a helpful, precise assistant with access to tools. "
-                            "Always use the 'current_time' tool when asked for the time or date. "
-                            "Use 'add' or 'multiply' for math. Use file tools for reading/writing files. "
-                            "Never guess the time — always call the tool."
-                        )
-                    },
-                    {"role": "user", "content": user_query}
-                ]
-
-                # First call: ask Ollama (with tool definitions)
-                response = ollama.chat(
-                    model=OLLAMA_MODEL,
-                    messages=messages,
-                    tools=[tool.model_dump() for tool in tools],
-                )
-
-                message = response["message"]
-                assistant_text = message.get("content", "")
-                if assistant_text:
-                    print(f"\nAssistant: {assistant_text}")
-
-                # Handle any tool calls
-                if "tool_calls" in message:
-                    for tool_call in message["tool_calls"]:
-                        func_name = tool_call["function"]["name"]
-                        args = tool_call["function"]["arguments"]
-                        print(f"\n🔧 Using tool: {func_name} with args → {args}")
-
-                        # Call the tool via MCP
-                        result = await session.call_tool(func_name, args)
-
-                        # Extract text content from the result
-                        content_text = ""
-                        if result.content:
-                            for part in result.content:
-                                if part.type == "text":
-                                    content_text += part.text
-
-                        # Append tool result to conversation
-                        messages.append(message)  # the assistant's tool call message
-                        messages.append({
-                            "role": "tool",
-                            "content": content_text or "Tool executed (no text output)",
-                            "name": func_name
-                        })
-
-                    # Final call: let Ollama summarize/use the tool results
-                    final_response = ollama.chat(
-                        model=OLLAMA_MODEL,
-                        messages=messages,
-                        tools=[tool.model_dump() for tool in tools],
-                    )
-                    final_text = final_response["message"]["content"]
-                    print(f"\nFinal Answer: {final_text}")
-                print("\n" + "—" * 50)
+    conversation = ConversationStore.load(session_id, token_budget=HISTORY_TOKEN_BUDGET)
+    if new_session:
+        conversation.clear()
+    elif conversation.turns:
+        print(f"Resuming session '{conversation.session_id}' ({len(conversation.turns)} recent turns)")
+
+    async with McpSessionManager(server_params) as manager:
+        # Discover all available tools (cached until the server says they changed)
+        tools, _ = await manager.tools()
+
+        print("\n=== Connected to MCP Server ===")
+        print(f"Available tools ({len(tools)}):")
+        for tool in tools:
+            print(f"  • {tool.name} — {tool.description}")
+        print("=" * 40)
+
+        while True:
+            # Read input off the event loop so server notifications are still handled
+            user_query = (await asyncio.to_thread(input, "\nEnter your query (or 'quit' to exit): ")).strip()
+            if user_query.lower() in {"quit", "exit", "bye"}:
+                print("Goodbye!")
+                break
+            if not user_query:
+                continue
+
+            _, tool_schemas = await manager.tools()
+
+            # Message history for Ollama: summary + recent turns, then this query
+            messages = conversation.context(SYSTEM_PROMPT)
+            turn_start = len(messages)
+            messages.append({"role": "user", "content": user_query})
+
+            # Earlier tool outputs too long to keep inline are read back through read_ref
+            final_text = await run_agent(manager, messages, tool_schemas + [READ_REF_TOOL],
+                                         local_tools={"read_ref": conversation.read_ref_tool})
+            print(f"\nFinal Answer: {final_text}")
+
+            conversation.add_turn(messages[turn_start:])
+            conversation.save()
+            print("\n" + "—" * 50)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chat with Ollama using tools from mcp_server.py")
+    parser.add_argument("--session", default="default", help="Conversation to resume or create")
+    parser.add_argument("--new", action="store_true", help="Start the session over")
+    parser.add_argument("--trace", default=os.environ.get("TRACE_LOG"), help="Append stage timings as JSONL to this file")
+    cli = parser.parse_args()
+    tracing.enable_jsonl(cli.trace)
+
     print("Starting MCP + Ollama client...")
     print(f"Using model: {OLLAMA_MODEL}")
     print("Tip: Pull a strong model with: ollama pull qwen2.5:7b")
-    asyncio.run(run_client())
\ No newline at end of file
+    asyncio.run(run_client(cli.session, cli.new))
\ No newline at end of file
@@ -2,34 +2,140 @@
 from mcp.server.fastmcp import FastMCP
 from pathlib import Path
 import datetime
+import base64
 import httpx
+import json
 import math
+import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tool_cache import ToolCache
 
 # Base directory locked to where the script lives
 BASE_DIR = Path(__file__).parent.resolve()
 
 mcp = FastMCP("Enhanced Local MCP Server")
+# Repeated identical calls (common with small models) are answered from memory
+tool_cache = ToolCache()
 
 @mcp.tool()
+@tool_cache.pure
 def echo(message: str) -> str:
     """Echo back the provided message exactly."""
     return f"Echo: {message}"
 
 @mcp.tool()
+@tool_cache.pure
 def add(a: float, b: float) -> float:
     """Add two numbers and return the sum."""
     return a + b
 
 @mcp.tool()
+@tool_cache.pure
 def multiply(a: float, b: float) -> float:
     """Multiply two numbers and return the product."""
     return a * b
 
 @mcp.tool()
+@tool_cache.pure
 def dot_mermsill(a: float, b: float, c: float) -> float:
     """Multiply three numbers and minius a number multiply by 2 and return the result."""
     return (a * b * c) - (a * 2) 
 
+# ==================== BATCH MATH ====================
+# One call per dataset instead of one JSON-RPC round trip per number. Arrays are passed
+# either as JSON lists or as base64-encoded little-endian float64 buffers (8 bytes per
+# value, far smaller than JSON for large columns); results come back in the same form
+# unless `encoding` says otherwise. A scalar operand is broadcast over the array.
+Numbers = list[float] | str
+
+
+def _as_array(values, name="values"):
+    if isinstance(values, str):
+        raw = base64.b64decode(values, validate=True)
+        if len(raw) % 8:
+            raise ValueError(f"{name}: base64 buffer length must be a multiple of 8 (float64)")
+        return np.frombuffer(raw, dtype="<f8")
+    return np.asarray(values, dtype=np.float64)
+
+
+def _operands(*pairs):
+    arrays = [_as_array(values, name) for name, values in pairs]
+    np.broadcast_shapes(*(a.shape for a in arrays))  # ValueError on mismatched lengths
+    return arrays
+
+
+def _encode(result, encoding, like):
+    if encoding == "auto":
+        encoding = "base64" if isinstance(like, str) else "list"
+    if encoding == "base64":
+        return base64.b64encode(np.ascontiguousarray(result, dtype="<f8").tobytes()).decode("ascii")
+    if encoding == "list":
+        return result.tolist()
+    raise ValueError(f"Unknown encoding {encoding!r}; use 'auto', 'list' or 'base64'")
+
+
+@mcp.tool()
+def batch_add(a: Numbers, b: Numbers | float, encoding: str = "auto") -> Numbers:
+    """Element-wise a + b over arrays (JSON list or base64 float64); b may be a single number."""
+    x, y = _operands(("a", a), ("b", b))
+    return _encode(x + y, encoding, a)
+
+
+@mcp.tool()
+def batch_multiply(a: Numbers, b: Numbers | float, encoding: str = "auto") -> Numbers:
+    """Element-wise a * b over arrays (JSON list or base64 float64); b may be a single number."""
+    x, y = _operands(("a", a), ("b", b))
+    return _encode(x * y, encoding, a)
+
+
+@mcp.tool()
+def batch_dot_mermsill(a: Numbers, b: Numbers | float, c: Numbers | float, encoding: str = "auto") -> Numbers:
+    """Element-wise dot_mermsill, (a * b * c) - (a * 2), over arrays; b and c may be single numbers."""
+    x, y, z = _operands(("a", a), ("b", b), ("c", c))
+    return _encode(x * y * z - x * 2, encoding, a)
+
+
+REDUCTIONS = {
+    "sum": np.sum, "mean": np.mean, "min": np.min, "max": np.max,
+    "prod": np.prod, "std": np.std, "median": np.median,
+}
+
+
+@mcp.tool()
+def batch_reduce(values: Numbers, operation: str = "sum") -> float:
+    """Reduce an array to one number: sum, mean, min, max, prod, std or median."""
+    if operation not in REDUCTIONS:
+        raise ValueError(f"Unknown operation {operation!r}; choose from {', '.join(REDUCTIONS)}")
+    x = _as_array(values)
+    if x.size == 0 and operation not in ("sum", "prod"):
+        raise ValueError(f"{operation} of an empty array is undefined")
+    return float(REDUCTIONS[operation](x))
+
+
+@mcp.tool()
+def batch_stats(values: Numbers) -> dict:
+    """Count, sum, mean, min, max and standard deviation of an array in one call."""
+    x = _as_array(values)
+    if x.size == 0:
+        return {"count": 0, "sum": 0.0}
+    return {"count": int(x.size), "sum": float(x.sum()), "mean": float(x.mean()),
+            "min": float(x.min()), "max": float(x.max()), "std": float(x.std())}
+
+
+@mcp.tool()
+def batch_dot(a: Numbers, b: Numbers) -> float:
+    """Dot product (sum of element-wise products) of two equal-length arrays."""
+    x, y = _operands(("a", a), ("b", b))
+    return float(np.dot(x, y))
+
+
+@mcp.resource("cache://tool-stats")
+def tool_cache_stats() -> str:
+    """Hit/miss/coalesced counts of the tool result cache, as JSON."""
+    return json.dumps(tool_cache.stats())
 
 
 # IMPORTANT: No print() statements here — they break the JSON-RPC protocol
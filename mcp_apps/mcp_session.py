@@ -0,0 +1,136 @@
+# mcp_session.py
+# Long-lived MCP stdio session with tool-schema caching and automatic restarts.
+#
+# A supervisor task owns the stdio_client / ClientSession context managers (anyio
+# requires them to be entered and exited by the same task). Callers borrow the current
+# session; when a call fails because the server went away they flag it as lost, the
+# supervisor restarts the subprocess with exponential backoff, and the call is retried.
+import asyncio
+
+import anyio
+from mcp import ClientSession, McpError, StdioServerParameters, types
+from mcp.client.stdio import stdio_client
+
+# Errors that mean the server process / pipe is gone rather than a tool failing
+CONNECTION_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream,
+                     BrokenPipeError, ConnectionError, EOFError)
+
+
+class ServerUnavailable(RuntimeError):
+    """The MCP server could not be (re)started within the restart budget."""
+
+
+def _is_connection_error(error) -> bool:
+    if isinstance(error, CONNECTION_ERRORS):
+        return True
+    return isinstance(error, McpError) and error.error.code == types.CONNECTION_CLOSED
+
+
+class McpSessionManager:
+    def __init__(self, server_params: StdioServerParameters, max_restarts: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 10.0):
+        self.server_params = server_params
+        self.max_restarts = max_restarts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.restarts = 0
+        self._session = None
+        self._tools = None
+        self._schemas = None
+        self._failure = None
+        self._ready = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._closing = False
+        self._supervisor = None
+
+    async def __aenter__(self):
+        self._supervisor = asyncio.create_task(self._supervise())
+        await self._wait_session()
+        return self
+
+    async def __aexit__(self, *exc):
+        self._closing = True
+        self._lost.set()
+        if self._supervisor is not None:
+            await self._supervisor
+
+    # ---------- supervisor ----------
+    async def _supervise(self):
+        attempt = 0
+        while not self._closing:
+            try:
+                async with stdio_client(self.server_params) as (read_stream, write_stream):
+                    async with ClientSession(read_stream, write_stream,
+                                             message_handler=self._on_message) as session:
+                        await session.initialize()
+                        self._session = session
+                        self.invalidate_tools()
+                        self._lost.clear()
+                        self._ready.set()
+                        attempt = 0
+                        await self._lost.wait()
+            except Exception as e:
+                self._failure = e
+            finally:
+                self._ready.clear()
+                self._session = None
+
+            if self._closing:
+                break
+            attempt += 1
+            self.restarts += 1
+            if attempt > self.max_restarts:
+                self._failure = ServerUnavailable(
+                    f"MCP server failed {attempt} times in a row (last error: {self._failure})")
+                break
+            await asyncio.sleep(min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        # Wake any waiters; with no session they get ServerUnavailable
+        self._ready.set()
+
+    async def _on_message(self, message):
+        if isinstance(message, types.ServerNotification) and \
+                isinstance(message.root, types.ToolListChangedNotification):
+            self.invalidate_tools()
+
+    async def _wait_session(self) -> ClientSession:
+        await self._ready.wait()
+        if self._session is None:
+            if isinstance(self._failure, ServerUnavailable):
+                raise self._failure
+            raise ServerUnavailable(f"MCP server unavailable: {self._failure}")
+        return self._session
+
+    def _mark_lost(self, session):
+        # Only the caller holding the current session may trigger a restart
+        if session is self._session:
+            self._ready.clear()
+            self._lost.set()
+
+    async def _with_session(self, operation):
+        """Run ``operation(session)``, restarting the server and retrying once if it died."""
+        session = await self._wait_session()
+        try:
+            return await operation(session)
+        except Exception as e:
+            if not _is_connection_error(e):
+                raise
+            self._mark_lost(session)
+        session = await self._wait_session()
+        return await operation(session)
+
+    # ---------- tools ----------
+    def invalidate_tools(self):
+        """Drop cached tool definitions; the next tools() call lists them again."""
+        self._tools = None
+        self._schemas = None
+
+    async def tools(self):
+        """Return (tools, schemas), where schemas are the serialized dicts sent to Ollama."""
+        if self._schemas is None:
+            response = await self._with_session(lambda session: session.list_tools())
+            self._tools = response.tools
+            self._schemas = [tool.model_dump() for tool in self._tools]
+        return self._tools, self._schemas
+
+    async def call_tool(self, name: str, arguments: dict):
+        return await self._with_session(lambda session: session.call_tool(name, arguments))
@@ -0,0 +1,100 @@
+# ollama_client.py
+# Shared Ollama client layer used by cover_letter_generator.py, web/app.py and mcp_apps/mcp_client.py.
+#
+# One ollama.Client per host keeps its httpx connection pool open between calls, and every
+# request carries keep_alive so the model stays loaded in Ollama instead of being evicted.
+# Settings come from the environment and can be changed at runtime with configure():
+#   OLLAMA_HOST, OLLAMA_MODEL, OLLAMA_KEEP_ALIVE, OLLAMA_TEMPERATURE, OLLAMA_TIMEOUT
+# Every call is traced as an "llm.generate" / "llm.chat" span with Ollama's token counts.
+# The ollama package (httpx, pydantic) is imported when the first client is created.
+import os
+import threading
+
+import tracing
+
+settings = {
+    "host": os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434"),
+    "model": os.environ.get("OLLAMA_MODEL", "gemma3:4b"),
+    "keep_alive": os.environ.get("OLLAMA_KEEP_ALIVE", "30m"),
+    "temperature": float(os.environ["OLLAMA_TEMPERATURE"]) if os.environ.get("OLLAMA_TEMPERATURE") else None,
+    "timeout": float(os.environ.get("OLLAMA_TIMEOUT", "300")),
+}
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def configure(**overrides):
+    """Update settings (host, model, keep_alive, temperature, timeout) and drop cached clients."""
+    unknown = set(overrides) - set(settings)
+    if unknown:
+        raise ValueError(f"Unknown Ollama settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        settings.update(overrides)
+        _clients.clear()
+
+
+def get_client(host: str = None):
+    """Return the process-wide ollama.Client for ``host`` (thread-safe, created once)."""
+    host = host or settings["host"]
+    client = _clients.get(host)
+    if client is None:
+        with _lock:
+            client = _clients.get(host)
+            if client is None:
+                import ollama
+                client = ollama.Client(host=host, timeout=settings["timeout"])
+                _clients[host] = client
+    return client
+
+
+def _options(temperature, options):
+    options = dict(options or {})
+    if temperature is None:
+        temperature = settings["temperature"]
+    if temperature is not None:
+        options.setdefault("temperature", temperature)
+    return options
+
+
+def _traced_call(kind, model, stream, call):
+    span = tracing.start_span(f"llm.{kind}", model=model, stream=stream)
+    try:
+        response = call()
+    except BaseException as e:
+        span.fail(e)
+        tracing.finish(span)
+        raise
+    if stream:
+        # The span ends when the stream does, so it covers generation, not just the request
+        return tracing.traced_stream(response, span)
+    tracing.llm_usage(span, response)
+    tracing.finish(span)
+    return response
+
+
+def generate(prompt: str, model: str = None, temperature: float = None, stream: bool = False,
+             options: dict = None, host: str = None):
+    """Single-prompt completion; returns the Ollama response (or a chunk iterator when streaming)."""
+    model = model or settings["model"]
+    return _traced_call("generate", model, stream, lambda: get_client(host).generate(
+        model=model,
+        prompt=prompt,
+        stream=stream,
+        options=_options(temperature, options),
+        keep_alive=settings["keep_alive"],
+    ))
+
+
+def chat(messages, model: str = None, temperature: float = None, tools=None, stream: bool = False,
+         options: dict = None, host: str = None):
+    """Chat completion; returns the Ollama response (or a chunk iterator when streaming)."""
+    model = model or settings["model"]
+    return _traced_call("chat", model, stream, lambda: get_client(host).chat(
+        model=model,
+        messages=messages,
+        tools=tools,
+        stream=stream,
+        options=_options(temperature, options),
+        keep_alive=settings["keep_alive"],
+    ))
@@ -0,0 +1,206 @@
+# text_compaction.py
+# Shrink resume / job description text before it goes into an LLM prompt.
+#
+# A 4B model on CPU spends most of a request evaluating the prompt, so every token of
+# repeated whitespace, EEO boilerplate or an irrelevant publication list costs latency.
+import math
+import os
+import re
+
+# Rough size of one token for English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", 3000))
+# Share of the budget given to the job description; the resume gets the rest
+JOB_BUDGET_SHARE = 0.4
+
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_WORD = re.compile(r"[a-z][a-z0-9+#.\-]{2,}")
+
+_RESUME_HEADINGS = {
+    "summary", "profile", "objective", "about", "about me", "experience", "work experience",
+    "professional experience", "employment", "employment history", "skills", "technical skills",
+    "core competencies", "education", "projects", "certifications", "certificates", "awards",
+    "publications", "presentations", "volunteer", "volunteering", "languages", "interests",
+    "references", "leadership", "activities", "research", "patents", "courses", "training",
+}
+# Sections that carry the most signal for a cover letter when budgets are tight
+_PRIORITY_HEADINGS = {"summary", "profile", "experience", "work experience", "professional experience",
+                      "skills", "technical skills", "core competencies"}
+
+_JOB_BOILERPLATE_HEADING = re.compile(
+    r"^(equal (employment )?opportunity|eeo|diversity|benefits|perks|what we offer|our benefits|"
+    r"compensation|salary|pay (range|transparency)|accommodations?|privacy|disclaimer|"
+    r"how to apply|e-verify)\b",
+    re.IGNORECASE,
+)
+_JOB_BOILERPLATE_SENTENCE = re.compile(
+    r"equal opportunity employer|without regard to (race|age|sex|gender)|reasonable accommodation|"
+    r"e-verify|protected veteran|applicant privacy|pay transparency|401\(?k\)?|paid time off",
+    re.IGNORECASE,
+)
+_STOPWORDS = {
+    "the", "and", "for", "with", "you", "your", "our", "are", "will", "have", "this", "that",
+    "from", "all", "who", "what", "can", "about", "their", "they", "able", "work", "team",
+    "role", "year", "years", "etc", "including", "such", "using", "use", "within", "into",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def normalize_text(text: str) -> str:
+    """Collapse runs of spaces and blank lines and drop repeated long lines (boilerplate).
+
+    Short lines such as job titles legitimately repeat, so only lines of 40+ characters
+    are de-duplicated.
+    """
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        line = _SPACES.sub(" ", line).strip()
+        if len(line) >= 40:
+            key = line.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _is_heading(line: str, known=None) -> bool:
+    bare = line.strip().rstrip(":").strip()
+    if not bare or len(bare) > 40 or bare.endswith("."):
+        return False
+    if known is not None and bare.lower() in known:
+        return True
+    return line.rstrip().endswith(":") or (bare.isupper() and any(c.isalpha() for c in bare))
+
+
+def split_sections(text: str, known_headings=None):
+    """Split text into [(heading, body)] at heading-like lines; the first heading may be ""."""
+    sections = []
+    heading, body = "", []
+    for line in text.splitlines():
+        if _is_heading(line, known_headings):
+            if heading or any(b.strip() for b in body):
+                sections.append((heading, "\n".join(body).strip()))
+            heading, body = line.strip().rstrip(":").strip(), []
+        else:
+            body.append(line)
+    if heading or any(b.strip() for b in body):
+        sections.append((heading, "\n".join(body).strip()))
+    return sections
+
+
+def _join_sections(sections) -> str:
+    return "\n\n".join(f"{h}\n{b}".strip() if h else b for h, b in sections).strip()
+
+
+def strip_job_boilerplate(text: str) -> str:
+    """Drop EEO / benefits / salary sections and stray legal sentences from a posting."""
+    kept = [(h, b) for h, b in split_sections(text) if not (h and _JOB_BOILERPLATE_HEADING.match(h))]
+    lines = [line for line in _join_sections(kept).splitlines() if not _JOB_BOILERPLATE_SENTENCE.search(line)]
+    return "\n".join(lines).strip()
+
+
+def _terms(text: str):
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def _cut_at_word(line: str, max_chars: int) -> str:
+    if len(line) <= max_chars:
+        return line
+    cut = line[:max_chars]
+    space = cut.rfind(" ")
+    # Fall back to a hard cut when there is no space in the last quarter
+    return (cut[:space] if space > max_chars * 3 // 4 else cut).rstrip()
+
+
+def _truncate_lines(text: str, max_tokens: int) -> str:
+    """Keep whole lines up to ``max_tokens``; the line that does not fit is cut at a word boundary."""
+    out, used = [], 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            # Single-line postings/resumes must not compact to nothing
+            room = (max_tokens - used - 1) * CHARS_PER_TOKEN
+            if room > 0:
+                piece = _cut_at_word(line, room)
+                if piece:
+                    out.append(piece)
+            break
+        out.append(line)
+        used += cost
+    return "\n".join(out)
+
+
+def select_resume_sections(resume: str, job: str, max_tokens: int) -> str:
+    """Keep the resume sections most relevant to the job within ``max_tokens``.
+
+    The leading block (name and contact details) is always kept, truncated to the budget
+    when there are no recognized headings and it is the whole resume. Other sections are
+    ranked by overlap with the job's vocabulary, normalized by section length, with a
+    boost for summary/experience/skills; the winners are re-emitted in original order.
+    """
+    if estimate_tokens(resume) <= max_tokens:
+        return resume
+    sections = split_sections(resume, _RESUME_HEADINGS)
+    if not sections:
+        return _truncate_lines(resume, max_tokens)
+
+    job_terms = set(_terms(job))
+    header, rest = sections[0], list(enumerate(sections[1:], 1))
+
+    def score(item):
+        heading, body = item[1]
+        words = _terms(f"{heading} {body}")
+        overlap = sum(1 for w in set(words) if w in job_terms)
+        boost = 2.0 if heading.lower() in _PRIORITY_HEADINGS else 1.0
+        return boost * overlap / math.sqrt(len(words) + 1)
+
+    if estimate_tokens(_join_sections([header])) > max_tokens:
+        header = ("", _truncate_lines(_join_sections([header]), max_tokens))
+    budget = max_tokens - estimate_tokens(_join_sections([header]))
+    chosen = {0: header}
+    for index, (heading, body) in sorted(rest, key=score, reverse=True):
+        cost = estimate_tokens(f"{heading}\n{body}") + 1
+        if cost <= budget:
+            chosen[index] = (heading, body)
+            budget -= cost
+        elif budget > 50:
+            # Partial section is still better than none when it is highly ranked
+            chosen[index] = (heading, _truncate_lines(body, budget - estimate_tokens(heading) - 1))
+            budget = 0
+    result = _join_sections([chosen[i] for i in sorted(chosen)])
+    # Section separators are not counted above; trim the tail if they tipped it over
+    if estimate_tokens(result) > max_tokens:
+        result = _truncate_lines(result, max_tokens)
+    return result
+
+
+def compact_job_description(job: str, max_tokens: int = None) -> str:
+    job = strip_job_boilerplate(normalize_text(job))
+    if max_tokens is not None and estimate_tokens(job) > max_tokens:
+        job = _truncate_lines(job, max_tokens)
+    return job
+
+
+def compact_prompt_inputs(resume: str, job: str, token_budget: int = PROMPT_TOKEN_BUDGET) -> dict:
+    """Compact both inputs to fit ``token_budget`` and report the tokens saved.
+
+    Returns {"resume", "job", "tokens_before", "tokens_after", "tokens_saved"}.
+    """
+    before = estimate_tokens(resume) + estimate_tokens(job)
+    job_out = compact_job_description(job, int(token_budget * JOB_BUDGET_SHARE))
+    resume_out = normalize_text(resume)
+    resume_out = select_resume_sections(resume_out, job_out, token_budget - estimate_tokens(job_out))
+    after = estimate_tokens(resume_out) + estimate_tokens(job_out)
+    return {
+        "resume": resume_out,
+        "job": job_out,
+        "tokens_before": before,
+        "tokens_after": after,
+        "tokens_saved": before - after,
+    }
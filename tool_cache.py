@@ -0,0 +1,185 @@
+# tool_cache.py
+# Result cache + in-flight deduplication for FastMCP tools.
+#
+# Small models often repeat the exact same tool call within a session. Tools opt in by
+# declaring how their result may be reused:
+#
+#     tool_cache = ToolCache()
+#
+#     @mcp.tool()
+#     @tool_cache.pure                      # result depends only on the arguments
+#     def add(a: float, b: float) -> float: ...
+#
+#     @mcp.tool()
+#     @tool_cache.file_backed("filepath")   # ...and on the file named by `filepath`
+#     def read_file(filepath: str) -> str: ...
+#
+# File-backed entries remember the file's (mtime, size) and are recomputed when either
+# changes. Identical calls that arrive while the first is still running wait for its
+# result instead of running again. Exceptions are never cached.
+import asyncio
+import functools
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class _Pending:
+    """A computation other callers with the same key can wait on (thread or task)."""
+    __slots__ = ("event", "future", "value", "error")
+
+    def __init__(self, is_async):
+        self.event = None if is_async else threading.Event()
+        self.future = asyncio.get_running_loop().create_future() if is_async else None
+        self.value = None
+        self.error = None
+
+
+class ToolCache:
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (stamp, value)
+        self._inflight = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    # ---------- decorators ----------
+    def pure(self, fn):
+        """Cache ``fn`` by its arguments alone."""
+        return self._wrap(fn, stamp=lambda args: None)
+
+    def file_backed(self, path_arg: str, skip=None):
+        """Cache by arguments, invalidated when the file/directory in ``path_arg`` changes.
+
+        ``skip(args)`` may return True for calls that must not be cached (e.g. listings
+        that report per-file sizes, which change without touching the directory mtime).
+        """
+        def stamp(args):
+            if skip is not None and skip(args):
+                return False
+            try:
+                st = os.stat(args[path_arg])
+            except (OSError, TypeError, ValueError):
+                return False  # missing/invalid path: let the tool report the error, uncached
+            return os.path.realpath(args[path_arg]), st.st_mtime_ns, st.st_size
+
+        return lambda fn: self._wrap(fn, stamp)
+
+    # ---------- internals ----------
+    def _count(self, name, field):
+        with self._lock:
+            self._stats.setdefault(name, {"hits": 0, "misses": 0, "coalesced": 0, "bypassed": 0})[field] += 1
+
+    def _key(self, fn, signature, args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        try:
+            return fn.__qualname__ + json.dumps(bound.arguments, sort_keys=True, default=repr), bound.arguments
+        except (TypeError, ValueError):
+            return None, bound.arguments
+
+    def _claim(self, key, stamp, is_async):
+        """Return (hit, value, pending, owner); the owner must compute and resolve pending."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                return True, entry[1], None, False
+            pending = self._inflight.get((key, stamp))
+            if pending is not None:
+                return False, None, pending, False
+            pending = self._inflight[(key, stamp)] = _Pending(is_async)
+            return False, None, pending, True
+
+    def _release(self, key, stamp):
+        with self._lock:
+            self._inflight.pop((key, stamp), None)
+
+    def _store(self, key, stamp, value):
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _wrap(self, fn, stamp):
+        signature = inspect.signature(fn)
+        name = fn.__name__
+
+        def prepare(args, kwargs):
+            key, arguments = self._key(fn, signature, args, kwargs)
+            file_stamp = stamp(arguments) if key is not None else False
+            return key, file_stamp
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                key, file_stamp = prepare(args, kwargs)
+                if file_stamp is False:
+                    self._count(name, "bypassed")
+                    return await fn(*args, **kwargs)
+                hit, value, pending, owner = self._claim(key, file_stamp, is_async=True)
+                if hit:
+                    self._count(name, "hits")
+                    return value
+                if not owner:
+                    self._count(name, "coalesced")
+                    return await asyncio.shield(pending.future)
+                self._count(name, "misses")
+                try:
+                    value = await fn(*args, **kwargs)
+                    self._store(key, file_stamp, value)
+                    pending.future.set_result(value)
+                    return value
+                except BaseException as e:
+                    pending.future.set_exception(e)
+                    pending.future.exception()  # mark retrieved when nobody else was waiting
+                    raise
+                finally:
+                    self._release(key, file_stamp)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key, file_stamp = prepare(args, kwargs)
+            if file_stamp is False:
+                self._count(name, "bypassed")
+                return fn(*args, **kwargs)
+            hit, value, pending, owner = self._claim(key, file_stamp, is_async=False)
+            if hit:
+                self._count(name, "hits")
+                return value
+            if not owner:
+                self._count(name, "coalesced")
+                pending.event.wait()
+                if pending.error is not None:
+                    raise pending.error
+                return pending.value
+            self._count(name, "misses")
+            try:
+                pending.value = fn(*args, **kwargs)
+                self._store(key, file_stamp, pending.value)
+                return pending.value
+            except BaseException as e:
+                pending.error = e
+                raise
+            finally:
+                self._release(key, file_stamp)
+                pending.event.set()
+        return wrapper
+
+    # ---------- stats ----------
+    def stats(self) -> dict:
+        with self._lock:
+            tools = {name: dict(counts) for name, counts in self._stats.items()}
+            entries = len(self._entries)
+        hits = sum(t["hits"] + t["coalesced"] for t in tools.values())
+        calls = hits + sum(t["misses"] for t in tools.values())
+        return {"entries": entries, "max_entries": self.max_entries,
+                "hit_rate": round(hits / calls, 3) if calls else 0.0, "tools": tools}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
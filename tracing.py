@@ -0,0 +1,242 @@
+# tracing.py
+# Lightweight spans and metrics for the cover letter, /ask and MCP paths.
+#
+# Spans time one stage (resume extraction, an LLM call, DOCX/PDF rendering, /ask parsing,
+# an MCP tool call). LLM spans also carry Ollama's prompt_eval_count / eval_count and
+# durations. Every finished span updates in-process counters and histograms, exported in
+# Prometheus text format by prometheus_text() (web/app.py serves it at /metrics), and is
+# appended to a JSONL log when one is enabled with enable_jsonl() or TRACE_LOG=<path>.
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds: sub-second parsing up to multi-minute generations
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_current = contextvars.ContextVar("tracing_span", default=None)
+_lock = threading.Lock()
+_spans = {}  # name -> {"count", "errors", "sum", "buckets"}
+_llm = {}    # name -> {"prompt_tokens", "eval_tokens", "prompt_eval_seconds", "eval_seconds"}
+_jsonl = None
+
+
+class Span:
+    __slots__ = ("name", "attrs", "trace_id", "span_id", "parent_id", "ts", "started", "error")
+
+    def __init__(self, name, attrs, parent=None):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.ts = time.time()
+        self.started = time.perf_counter()
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def fail(self, error):
+        """Mark the span failed without raising (for errors the caller handles)."""
+        self.error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+
+
+# ==================== SPANS ====================
+def start_span(name, **attrs) -> Span:
+    """Start a span without making it current; end it with finish(). For generators/streams."""
+    return Span(name, attrs, _current.get())
+
+
+def finish(span: Span, duration: float = None):
+    duration = time.perf_counter() - span.started if duration is None else duration
+    _observe(span.name, duration, span.error is not None)
+    if _jsonl is not None:
+        _write({"ts": round(span.ts, 3), "trace": span.trace_id, "span": span.span_id,
+                "parent": span.parent_id, "name": span.name, "duration_s": round(duration, 6),
+                "error": span.error, **span.attrs})
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the enclosed block as ``name``; nested spans record their parent."""
+    s = start_span(name, **attrs)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.fail(e)
+        raise
+    finally:
+        _current.reset(token)
+        finish(s)
+
+
+def traced(name):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def annotate(**attrs):
+    """Add attributes to the current span, if any."""
+    s = _current.get()
+    if s is not None:
+        s.set(**attrs)
+
+
+def record(name, seconds, **attrs):
+    """Record a stage timed elsewhere (e.g. a PDF built in a worker process)."""
+    s = start_span(name, **attrs)
+    finish(s, seconds)
+
+
+# ==================== LLM USAGE ====================
+def _field(response, key):
+    try:
+        return response[key]
+    except (KeyError, TypeError, IndexError):
+        return getattr(response, key, None)
+
+
+def llm_usage(span: Span, response):
+    """Copy Ollama's token counts and durations (ns) from a final response/chunk onto ``span``."""
+    prompt_tokens = _field(response, "prompt_eval_count") or 0
+    eval_tokens = _field(response, "eval_count") or 0
+    prompt_eval_s = (_field(response, "prompt_eval_duration") or 0) / 1e9
+    eval_s = (_field(response, "eval_duration") or 0) / 1e9
+    span.set(prompt_tokens=prompt_tokens, eval_tokens=eval_tokens,
+             prompt_eval_s=round(prompt_eval_s, 4), eval_s=round(eval_s, 4),
+             load_s=round((_field(response, "load_duration") or 0) / 1e9, 4))
+    if eval_s:
+        span.set(tokens_per_s=round(eval_tokens / eval_s, 1))
+    with _lock:
+        totals = _llm.setdefault(span.name, {"prompt_tokens": 0, "eval_tokens": 0,
+                                             "prompt_eval_seconds": 0.0, "eval_seconds": 0.0})
+        totals["prompt_tokens"] += prompt_tokens
+        totals["eval_tokens"] += eval_tokens
+        totals["prompt_eval_seconds"] += prompt_eval_s
+        totals["eval_seconds"] += eval_s
+
+
+def traced_stream(chunks, span: Span):
+    """Pass streamed chunks through, timing the first token and ending ``span`` with the stream.
+
+    Closing this generator closes ``chunks`` too.
+    """
+    first = True
+    try:
+        for chunk in chunks:
+            if first:
+                span.set(first_token_s=round(time.perf_counter() - span.started, 4))
+                first = False
+            if _field(chunk, "done"):
+                llm_usage(span, chunk)
+            yield chunk
+    except GeneratorExit:
+        span.set(cancelled=True)
+        raise
+    except BaseException as e:
+        span.fail(e)
+        raise
+    finally:
+        # Close the wrapped stream now rather than whenever it is collected: for Ollama
+        # that drops the HTTP connection, which is what stops a cancelled generation
+        close = getattr(chunks, "close", None)
+        try:
+            if close is not None:
+                close()
+        finally:
+            finish(span)
+
+
+# ==================== METRICS ====================
+def _observe(name, seconds, failed):
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = {"count": 0, "errors": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS)}
+        stats["count"] += 1
+        stats["errors"] += failed
+        stats["sum"] += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                stats["buckets"][i] += 1
+
+
+def snapshot() -> dict:
+    """Per-span count/errors/total seconds and per-LLM-span token totals."""
+    with _lock:
+        return {
+            "spans": {name: {"count": s["count"], "errors": s["errors"], "seconds": round(s["sum"], 3)}
+                      for name, s in _spans.items()},
+            "llm": {name: dict(t) for name, t in _llm.items()},
+        }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(prefix="automation") -> str:
+    """All span and LLM metrics in the Prometheus text exposition format."""
+    with _lock:
+        spans = {name: dict(s, buckets=list(s["buckets"])) for name, s in _spans.items()}
+        llm = {name: dict(t) for name, t in _llm.items()}
+
+    lines = [f"# HELP {prefix}_span_seconds Duration of traced stages.",
+             f"# TYPE {prefix}_span_seconds histogram"]
+    for name in sorted(spans):
+        s, label = spans[name], _label(name)
+        for bound, count in zip(BUCKETS, s["buckets"]):
+            lines.append(f'{prefix}_span_seconds_bucket{{span="{label}",le="{bound}"}} {count}')
+        lines.append(f'{prefix}_span_seconds_bucket{{span="{label}",le="+Inf"}} {s["count"]}')
+        lines.append(f'{prefix}_span_seconds_sum{{span="{label}"}} {s["sum"]:.6f}')
+        lines.append(f'{prefix}_span_seconds_count{{span="{label}"}} {s["count"]}')
+
+    lines += [f"# HELP {prefix}_span_errors_total Traced stages that raised or reported an error.",
+              f"# TYPE {prefix}_span_errors_total counter"]
+    lines += [f'{prefix}_span_errors_total{{span="{_label(name)}"}} {spans[name]["errors"]}' for name in sorted(spans)]
+
+    for metric, help_text in (("prompt_tokens", "Prompt tokens evaluated by Ollama."),
+                              ("eval_tokens", "Tokens generated by Ollama."),
+                              ("prompt_eval_seconds", "Ollama prompt evaluation time."),
+                              ("eval_seconds", "Ollama generation time.")):
+        lines += [f"# HELP {prefix}_llm_{metric}_total {help_text}",
+                  f"# TYPE {prefix}_llm_{metric}_total counter"]
+        lines += [f'{prefix}_llm_{metric}_total{{span="{_label(name)}"}} {llm[name][metric]}' for name in sorted(llm)]
+    return "\n".join(lines) + "\n"
+
+
+# ==================== JSONL LOG ====================
+def enable_jsonl(path: str):
+    """Append every finished span to ``path`` as one JSON line (None disables)."""
+    global _jsonl
+    with _lock:
+        if _jsonl is not None:
+            _jsonl.close()
+            _jsonl = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            _jsonl = open(path, "a", encoding="utf-8")
+
+
+def _write(record):
+    line = json.dumps(record, default=str) + "\n"
+    with _lock:
+        if _jsonl is not None:
+            _jsonl.write(line)
+            _jsonl.flush()
+
+
+if os.environ.get("TRACE_LOG"):
+    enable_jsonl(os.environ["TRACE_LOG"])
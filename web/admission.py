@@ -0,0 +1,69 @@
+# admission.py
+# Bounded in-flight limit with a short wait queue for the /ask routes.
+#
+# Ollama only runs OLLAMA_NUM_PARALLEL generations at once and queues the rest
+# internally, where callers just time out. Limiting in-flight requests here and
+# turning a full queue into "429 Retry-After" lets clients back off instead.
+import threading
+import time
+
+
+class Overloaded(Exception):
+    """No slot became free in time; ``retry_after`` is a suggested wait in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Server busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        # Moving average of how long a request holds a slot, used for Retry-After
+        self.avg_service_s = 10.0
+        self._cond = threading.Condition()
+
+    def retry_after(self) -> int:
+        rounds = (self.waiting + self.in_flight) / self.max_in_flight
+        return max(1, int(round(rounds * self.avg_service_s)))
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed; raises Overloaded when full or timed out."""
+        with self._cond:
+            if self.in_flight >= self.max_in_flight:
+                if self.waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise Overloaded(self.retry_after())
+                self.waiting += 1
+                try:
+                    admitted = self._cond.wait_for(lambda: self.in_flight < self.max_in_flight,
+                                                   timeout=self.queue_timeout)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    self.rejected += 1
+                    raise Overloaded(self.retry_after())
+            self.in_flight += 1
+        return time.perf_counter()
+
+    def release(self, acquired_at: float):
+        with self._cond:
+            self.in_flight -= 1
+            self.avg_service_s = 0.8 * self.avg_service_s + 0.2 * (time.perf_counter() - acquired_at)
+            self._cond.notify()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "rejected": self.rejected,
+                "avg_service_s": round(self.avg_service_s, 3),
+            }
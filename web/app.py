@@ -1,24 +1,32 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, render_template, request, stream_with_context
 from markupsafe import Markup
-import requests
-import subprocess
 from flask import jsonify 
-import ollama
 import json
-import re
+import os
+import sys
+import threading
+
+# Shared Ollama client layer lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ollama_client import chat, get_client, settings as ollama_settings
+from admission import AdmissionGate, Overloaded
+from response_cache import ResponseCache
+from ask_parser import PageParser, parse_page
+from knowledge import KnowledgeStore, UnknownProfile
+import tracing
 
 
 
 app = Flask(__name__)
 
 
-# Load custom knowledge once at startup
-try:
-    with open("custom_knowledge.txt", "r", encoding="utf-8") as f:
-        CUSTOM_KNOWLEDGE = f.read()
-except Exception as e:
-    CUSTOM_KNOWLEDGE = ""
-    print(f"Error loading custom knowledge: {e}")
+# System knowledge: custom_knowledge.txt plus knowledge/<profile>.txt, reloaded when edited
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+knowledge = KnowledgeStore(
+    os.path.join(APP_DIR, "custom_knowledge.txt"),
+    profiles_dir=os.path.join(APP_DIR, "knowledge"),
+    check_interval=float(os.environ.get("KNOWLEDGE_CHECK_INTERVAL", 1.0)),
+)
 
 @app.route("/")
 def home():
@@ -46,76 +54,169 @@ def greet():
 
 #AI Generate Website
 
+# Match ASK_MAX_CONCURRENCY to Ollama's OLLAMA_NUM_PARALLEL; extra requests wait in a
+# short queue and get 429 + Retry-After when it is full or the wait times out.
+ask_gate = AdmissionGate(
+    max_in_flight=int(os.environ.get("ASK_MAX_CONCURRENCY", os.environ.get("OLLAMA_NUM_PARALLEL", 4))),
+    max_queue=int(os.environ.get("ASK_MAX_QUEUE", 16)),
+    queue_timeout=float(os.environ.get("ASK_QUEUE_TIMEOUT", 30)),
+)
+
+# Finished pages keyed by normalized prompt + model + knowledge hash; hits skip the model
+ask_cache = ResponseCache(
+    ttl=float(os.environ.get("ASK_CACHE_TTL", 3600)),
+    max_entries=int(os.environ.get("ASK_CACHE_SIZE", 256)),
+    persist=os.environ.get("ASK_CACHE_PERSIST") == "1",
+)
+
+
+def cache_key(prompt, profile):
+    return ResponseCache.key(prompt, ollama_settings["model"], knowledge.digest(profile))
+
+
+def render_ask(explanation="", page_html="", profile=None):
+    return render_template(
+        "ask.html",
+        response=explanation,
+        page_html=page_html,  # ← plain string
+        profiles=knowledge.profiles(),
+        profile=profile or "default",
+    )
+
+def build_messages(prompt, profile=None):
+    # The system message object is shared and unchanged between requests, so the
+    # prompt prefix stays byte-identical and Ollama reuses its cached evaluation
+    return [
+        knowledge.system_message(profile),
+        {"role": "user", "content": prompt}
+    ]
+
+
 @app.route("/ask", methods=["GET", "POST"])
 def ask():
     explanation = ""
     preview_html = ""  # ← Plain string, NOT Markup()
+    profile = request.values.get("profile") or None
 
     if request.method == "POST":
-        prompt = request.form.get("prompt")
+        prompt = request.form.get("prompt", "").strip()
+        raw = ""
+        if not prompt:
+            return render_ask("Please enter a prompt.", profile=profile), 400
+
+        try:
+            key = cache_key(prompt, profile)
+        except UnknownProfile:
+            return render_ask(f"Unknown knowledge profile: {profile}"), 400
+        cached = ask_cache.get(key)
+        if cached is not None:
+            return render_ask(cached["explanation"], cached["html"], profile)
+
+        try:
+            acquired_at = ask_gate.acquire()
+        except Overloaded as e:
+            body = render_ask(f"Server busy, please retry in {e.retry_after}s.", profile=profile)
+            return body, 429, {"Retry-After": str(e.retry_after)}
 
         try:
-            response = ollama.chat(
-                model="gemma3:4b",
-                messages=[
-                    {"role": "system", "content": CUSTOM_KNOWLEDGE or "You are a helpful assistant."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            response = chat(messages=build_messages(prompt, profile))
             raw = response['message']['content']
             print("Raw AI response:\n", raw)
 
-            # --- Extract JSON safely ---
-            text = raw.strip()
-            text = re.sub(r"^```json\s*|```$", "", text, flags=re.MULTILINE)
-
-            start = text.find("{")
-            end = text.rfind("}") + 1
-            if start == -1 or end == 0:
-                raise ValueError("No JSON found")
-
-            json_part = text[start:end]
-            data = json.loads(json_part)
-
-            explanation = data.get("explanation", "No explanation provided.")
-            html_from_ai = data.get("html", "").strip()
-
-            if html_from_ai:
-                # Extract <style> if exists
-                style_match = re.search(r"<style.*?>.*?</style>", html_from_ai, re.DOTALL | re.IGNORECASE)
-                style = style_match.group(0) if style_match else ""
-
-                # Remove <style> from body
-                body = re.sub(r"<style.*?>.*?</style>", "", html_from_ai, re.DOTALL | re.IGNORECASE).strip()
-
-                # Build complete valid HTML
-                full_html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Generated Page</title>
-    {style}
-</head>
-<body>
-    {body}
-</body>
-</html>"""
-
-                # IMPORTANT: Just store as plain string (NO Markup, NO escaping tricks)
-                preview_html = full_html
-
-            else:
-                explanation += " (AI returned no HTML)"
+            # IMPORTANT: Just store as plain string (NO Markup, NO escaping tricks)
+            with tracing.span("ask.parse", chars=len(raw)):
+                explanation, preview_html = parse_page(raw)
+            if preview_html:
+                ask_cache.set(key, explanation, preview_html)
 
         except Exception as e:
             explanation = f"Error: {str(e)}<br><pre>{raw[:800]}</pre>"
+        finally:
+            ask_gate.release(acquired_at)
+
+    return render_ask(explanation, preview_html, profile)
+
+
+def sse(data, event=None):
+    """Format one Server-Sent Event; data is JSON-encoded so newlines survive."""
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data)}\n\n"
+
+
+@app.route("/ask/stream")
+def ask_stream():
+    """Stream tokens as Server-Sent Events, then a final "done" event with the assembled page."""
+    prompt = request.args.get("prompt", "").strip()
+    if not prompt:
+        return jsonify({"error": "prompt is required"}), 400
+
+    profile = request.args.get("profile") or None
+    try:
+        key = cache_key(prompt, profile)
+    except UnknownProfile:
+        return jsonify({"error": f"Unknown knowledge profile: {profile}"}), 400
+    cached = ask_cache.get(key)
+    if cached is not None:
+        return Response(sse(cached, event="done"), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache"})
+
+    try:
+        acquired_at = ask_gate.acquire()
+    except Overloaded as e:
+        return jsonify({"error": str(e)}), 429, {"Retry-After": str(e.retry_after)}
+
+    # The generator may never start (HEAD, or a client gone before the first chunk), so
+    # the slot is also released when the response closes; whichever runs first wins.
+    released = threading.Lock()
+
+    def release_slot():
+        if released.acquire(blocking=False):
+            ask_gate.release(acquired_at)
+
+    def events():
+        parser = PageParser()
+        try:
+            for chunk in chat(messages=build_messages(prompt, profile), stream=True):
+                token = chunk['message']['content']
+                if token:
+                    parser.feed(token)
+                    yield sse(token)
+            with tracing.span("ask.parse", stream=True):
+                explanation, full_html = parser.finish()
+            if full_html:
+                ask_cache.set(key, explanation, full_html)
+            yield sse({"explanation": explanation, "html": full_html}, event="done")
+        except Exception as e:
+            yield sse({"error": str(e)}, event="error")
+        finally:
+            # Runs when the stream ends or the client disconnects
+            release_slot()
+
+    response = Response(stream_with_context(events()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.call_on_close(release_slot)
+    return response
+
+
+@app.route("/ask/status")
+def ask_status():
+    return jsonify({"admission": ask_gate.stats(), "cache": ask_cache.stats(), "knowledge": knowledge.stats()})
+
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus scrape endpoint: stage latency histograms and Ollama token counters."""
+    return Response(tracing.prometheus_text(), mimetype="text/plain; version=0.0.4")
 
-    return render_template(
-        "ask.html",
-        response=explanation,
-        page_html=preview_html  # ← plain string
-    )
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    # Each /ask request holds a thread while it waits on Ollama, so size the pool for
+    # the in-flight slots plus the wait queue. ASK_SERVER=waitress for a production server.
+    threads = ask_gate.max_in_flight + ask_gate.max_queue + 4
+    # Import the ollama client in the background so the server starts listening right away
+    threading.Thread(target=get_client, daemon=True, name="ollama-warm-up").start()
+    if os.environ.get("ASK_SERVER") == "waitress":
+        from waitress import serve
+        serve(app, host=os.environ.get("HOST", "127.0.0.1"), port=int(os.environ.get("PORT", 5000)), threads=threads)
+    else:
+        app.run(debug=True, threaded=True)
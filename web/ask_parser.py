@@ -0,0 +1,145 @@
+# ask_parser.py
+# Incremental parser for the model's {"explanation": ..., "html": ...} reply.
+#
+# feed() can be called with each streamed token: it tracks JSON string/brace state as
+# text arrives, so finish() only has to json.loads the object it already delimited.
+# <style> blocks are split out of the HTML in a single precompiled-regex pass.
+import json
+import re
+
+# Outside a JSON string only braces and quotes matter; a string body (with escapes) is
+# consumed in one regex match up to its closing quote or the end of the chunk
+_OUTSIDE_STRING = re.compile(r'[{}"]')
+_STRING_BODY = re.compile(r'(?:[^"\\]+|\\.)*', re.DOTALL)
+_decoder = json.JSONDecoder()
+_STYLE_BLOCK = re.compile(r"<style\b[^>]*>.*?</style\s*>", re.DOTALL | re.IGNORECASE)
+
+PAGE_TEMPLATE_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Generated Page</title>
+    """
+PAGE_TEMPLATE_MIDDLE = """
+</head>
+<body>
+    """
+PAGE_TEMPLATE_TAIL = """
+</body>
+</html>"""
+
+
+def split_styles(html: str):
+    """Return (all <style> blocks joined, html with them removed) in one pass."""
+    styles = []
+    body = []
+    last = 0
+    for match in _STYLE_BLOCK.finditer(html):
+        body.append(html[last:match.start()])
+        styles.append(match.group(0))
+        last = match.end()
+    if not styles:
+        return "", html.strip()
+    body.append(html[last:])
+    return "\n".join(styles), "".join(body).strip()
+
+
+def assemble_page(html: str) -> str:
+    """Wrap model HTML in a complete document with its <style> blocks moved into <head>."""
+    style, body = split_styles(html)
+    return "".join((PAGE_TEMPLATE_HEAD, style, PAGE_TEMPLATE_MIDDLE, body, PAGE_TEMPLATE_TAIL))
+
+
+class PageParser:
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0       # characters fed so far
+        self._start = -1       # absolute index of the opening brace
+        self._end = -1         # absolute index just past the closing brace
+        self._depth = 0
+        self._in_string = False
+        self._skip_next = False  # a backslash ended the previous chunk
+
+    @property
+    def complete(self) -> bool:
+        """True once the outermost JSON object has been closed."""
+        return self._end != -1
+
+    def feed(self, chunk: str):
+        if not chunk:
+            return self
+        self._chunks.append(chunk)
+        if self._end == -1:
+            self._scan(chunk, self._offset)
+        self._offset += len(chunk)
+        return self
+
+    def _scan(self, chunk: str, base: int):
+        pos = 0
+        if self._skip_next:
+            pos, self._skip_next = 1, False
+        if self._start == -1:
+            pos = chunk.find("{", pos)
+            if pos == -1:
+                return
+            self._start = base + pos
+            self._depth, pos = 1, pos + 1
+
+        size = len(chunk)
+        while pos < size:
+            if self._in_string:
+                pos = _STRING_BODY.match(chunk, pos).end()
+                if pos >= size:
+                    return
+                if chunk[pos] == "\\":
+                    # Escape split across chunks: its escaped character starts the next one
+                    self._skip_next = True
+                    return
+                self._in_string = False
+                pos += 1
+                continue
+            match = _OUTSIDE_STRING.search(chunk, pos)
+            if match is None:
+                return
+            char = match.group()
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = base + match.end()
+                    return
+            pos = match.end()
+
+    def finish(self):
+        """Return (explanation, full_html); full_html is "" when the model sent no HTML."""
+        if self._start == -1:
+            raise ValueError("No JSON found")
+        if self._end == -1:
+            raise ValueError("Incomplete JSON in model output")
+        data = json.loads("".join(self._chunks)[self._start:self._end])
+        return _page_from_data(data)
+
+
+def _page_from_data(data):
+    explanation = data.get("explanation", "No explanation provided.")
+    html = data.get("html", "").strip()
+    if not html:
+        return explanation + " (AI returned no HTML)", ""
+    return explanation, assemble_page(html)
+
+
+def parse_page(raw: str):
+    """One-shot form of PageParser for a complete reply.
+
+    With the whole text available the decoder itself finds the end of the object, so
+    no separate scan is needed.
+    """
+    start = raw.find("{")
+    if start == -1:
+        raise ValueError("No JSON found")
+    data, _ = _decoder.raw_decode(raw, start)
+    return _page_from_data(data)
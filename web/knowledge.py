@@ -0,0 +1,115 @@
+# knowledge.py
+# Hot-reloadable system knowledge for /ask.
+#
+# Profiles are plain text files: "default" is custom_knowledge.txt next to app.py and
+# every knowledge/<name>.txt adds a profile <name>. Files are re-checked (mtime + size)
+# at most every check_interval seconds and swapped in atomically, so edits apply without
+# a restart. Until a file changes the same system message object is handed out, keeping
+# the prompt prefix byte-identical so Ollama can reuse its cached evaluation of it.
+import hashlib
+import os
+import threading
+import time
+
+DEFAULT_PROFILE = "default"
+FALLBACK_KNOWLEDGE = "You are a helpful assistant."
+
+
+class UnknownProfile(KeyError):
+    pass
+
+
+class _Profile:
+    __slots__ = ("path", "stamp", "text", "digest", "message")
+
+    def __init__(self, path, stamp, text):
+        self.path = path
+        self.stamp = stamp
+        self.text = text
+        self.digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.message = {"role": "system", "content": text or FALLBACK_KNOWLEDGE}
+
+
+class KnowledgeStore:
+    def __init__(self, default_path: str, profiles_dir: str = None, check_interval: float = 1.0):
+        self.default_path = default_path
+        self.profiles_dir = profiles_dir
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._profiles = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh(force=True)
+
+    def _sources(self) -> dict:
+        sources = {DEFAULT_PROFILE: self.default_path}
+        if self.profiles_dir and os.path.isdir(self.profiles_dir):
+            for name in os.listdir(self.profiles_dir):
+                stem, ext = os.path.splitext(name)
+                if ext == ".txt" and stem != DEFAULT_PROFILE:
+                    sources[stem] = os.path.join(self.profiles_dir, name)
+        return sources
+
+    def _refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if not force and now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            current = self._profiles
+            updated = {}
+            for name, path in self._sources().items():
+                try:
+                    st = os.stat(path)
+                    stamp = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    stamp = None
+                old = current.get(name)
+                if old is not None and old.path == path and old.stamp == stamp:
+                    updated[name] = old
+                    continue
+                text = ""
+                if stamp is not None:
+                    try:
+                        with open(path, "r", encoding="utf-8") as f:
+                            text = f.read()
+                    except OSError as e:
+                        print(f"Error loading knowledge profile {name!r}: {e}")
+                        if old is not None:
+                            updated[name] = old
+                            continue
+                elif name == DEFAULT_PROFILE:
+                    print(f"Error loading custom knowledge: {path} not found")
+                updated[name] = _Profile(path, stamp, text)
+                if old is not None:
+                    self.reloads += 1
+            # One assignment, so readers see either the old or the new set of profiles
+            self._profiles = updated
+
+    def _get(self, profile):
+        self._refresh()
+        name = profile or DEFAULT_PROFILE
+        try:
+            return self._profiles[name]
+        except KeyError:
+            raise UnknownProfile(name) from None
+
+    def text(self, profile: str = None) -> str:
+        return self._get(profile).text
+
+    def digest(self, profile: str = None) -> str:
+        """sha256 of the profile text; changes whenever the file content does."""
+        return self._get(profile).digest
+
+    def system_message(self, profile: str = None) -> dict:
+        """The system message for ``profile``; the same object until the file changes. Do not mutate."""
+        return self._get(profile).message
+
+    def profiles(self):
+        self._refresh()
+        return sorted(self._profiles)
+
+    def stats(self) -> dict:
+        return {"profiles": self.profiles(), "reloads": self.reloads}
@@ -1,29 +1,215 @@
 # server.py
+import fnmatch
+import hashlib
+import json
+import mmap
 import os
+import sys
+import threading
+from collections import OrderedDict
 from mcp.server.fastmcp import FastMCP
 from mcp.types import Resource, TextContent
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tool_cache import ToolCache
+
 mcp = FastMCP("SDK-MCP-Demo", host="0.0.0.0", port=8000, json_response=True)  # json_response for easy debugging
+# Results are reused until the file/directory they read changes (path + mtime + size)
+tool_cache = ToolCache()
+
+# Reads and listings are paged so a huge log or directory cannot flood the model context
+MAX_READ_BYTES = 64 * 1024
+MAX_LIST_ENTRIES = 1000
+# Files at least this large are sliced through mmap instead of read()
+MMAP_THRESHOLD = 1024 * 1024
+# Above this size the version tag is mtime+size rather than a full-content sha256
+HASH_LIMIT = 16 * 1024 * 1024
+
+
+class _LRU:
+    """Tiny thread-safe LRU used for file hashes and directory listings."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+# Keys include (mtime_ns, size) so any change to the file or directory misses
+_hashes = _LRU(256)
+_listings = _LRU(32)
+
+
+def _identity(path):
+    st = os.stat(path)
+    return os.path.realpath(path), st.st_mtime_ns, st.st_size
+
+
+def _open_bytes(path, size):
+    """Return (buffer, close) for the file: an mmap for big files, bytes otherwise."""
+    f = open(path, "rb")
+    if size >= MMAP_THRESHOLD:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        def close():
+            mm.close()
+            f.close()
+        return mm, close
+    data = f.read()
+    f.close()
+    return data, lambda: None
+
+
+def _file_version(path):
+    """Return (identity, version): sha256 of the content, or an mtime/size tag for huge files."""
+    ident = _identity(path)
+    version = _hashes.get(ident)
+    if version is None:
+        if ident[2] > HASH_LIMIT:
+            version = f"stat-{ident[1]:x}-{ident[2]:x}"
+        elif ident[2] == 0:
+            version = hashlib.sha256(b"").hexdigest()
+        else:
+            buf, close = _open_bytes(path, ident[2])
+            try:
+                version = hashlib.sha256(buf).hexdigest()
+            finally:
+                close()
+        _hashes.set(ident, version)
+    return ident, version
+
+
+def _line_slice(buf, start_line, end_line):
+    """Byte range covering 1-based lines [start_line, end_line] (end inclusive, None = EOF)."""
+    pos, line = 0, 1
+    while line < start_line:
+        nl = buf.find(b"\n", pos)
+        if nl == -1:
+            return len(buf), len(buf)
+        pos, line = nl + 1, line + 1
+    start = pos
+    if end_line is None:
+        return start, len(buf)
+    while line <= end_line:
+        nl = buf.find(b"\n", pos)
+        if nl == -1:
+            return start, len(buf)
+        pos, line = nl + 1, line + 1
+    return start, pos
+
 
 @mcp.tool()
-def list_files(directory: str = ".") -> str:
-    """List files in a directory."""
+# details report per-file sizes, which change without touching the directory mtime
+@tool_cache.file_backed("directory", skip=lambda args: args["details"])
+def list_files(directory: str = ".", pattern: str = "", cursor: str = "", limit: int = 200,
+               details: bool = False) -> str:
+    """List files in a directory, sorted by name, one page at a time.
+
+    pattern: optional glob such as "*.log". limit: entries per page (max 1000).
+    cursor: pass the "next cursor" from the previous page to continue.
+    details: include size in bytes and modification time for each entry.
+    """
     try:
-        files = os.listdir(directory)
-        return "\n".join(files)
+        ident = _identity(directory)
+        key = (ident[0], ident[1], pattern)
+        entries = _listings.get(key)
+        if entries is None:
+            entries = []
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if pattern and not fnmatch.fnmatch(entry.name, pattern):
+                        continue
+                    entries.append((entry.name, entry.is_dir()))
+            entries.sort()
+            _listings.set(key, entries)
+
+        offset = int(cursor) if cursor else 0
+        limit = max(1, min(limit, MAX_LIST_ENTRIES))
+        page = entries[offset:offset + limit]
+        lines = []
+        for name, is_dir in page:
+            if not details:
+                lines.append(name)
+                continue
+            # stat per page only: sizes/mtimes change without touching the directory mtime
+            try:
+                st = os.stat(os.path.join(directory, name))
+                lines.append(f"{name}\t{'dir' if is_dir else 'file'}\t{st.st_size}\t{int(st.st_mtime)}")
+            except OSError:
+                lines.append(f"{name}\t?\t?\t?")
+        if offset + limit < len(entries):
+            lines.append(f"[{len(entries)} entries; next cursor: {offset + limit}]")
+        return "\n".join(lines)
     except Exception as e:
         return f"Error: {str(e)}"
 
+
 @mcp.tool()
-def read_file(filepath: str) -> str:
-    """Read contents of a text file."""
+@tool_cache.file_backed("filepath")
+def read_file(filepath: str, offset: int = 0, length: int = 0, start_line: int = 0, end_line: int = 0,
+              if_hash: str = "") -> str:
+    """Read a text file, whole or in part.
+
+    Byte range: offset/length. Line range: start_line/end_line (1-based, inclusive).
+    At most 64 KB is returned per call; partial reads start with a header giving the
+    range, total size, version and how to continue. if_hash: the version from an earlier
+    read or file_info; if the file is unchanged only a short "unchanged" note is returned.
+    """
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            content = f.read()
+        ident, digest = _file_version(filepath)
+        if if_hash and if_hash == digest:
+            return f"[unchanged: version={digest}]"
+
+        size = ident[2]
+        buf, close = _open_bytes(filepath, size) if size else (b"", lambda: None)
+        try:
+            if start_line > 0:
+                start, stop = _line_slice(buf, start_line, end_line if end_line > 0 else None)
+            else:
+                start = min(max(offset, 0), size)
+                stop = size if length <= 0 else min(size, start + length)
+            stop = min(stop, start + MAX_READ_BYTES)
+            content = bytes(buf[start:stop]).decode("utf-8", errors="replace")
+        finally:
+            close()
+
+        if start > 0 or stop < size:
+            more = f"; continue with offset={stop}" if stop < size else ""
+            content = f"[bytes {start}-{stop} of {size}, version={digest}{more}]\n{content}"
         return content
     except Exception as e:
         return f"Error: {str(e)}"
 
+
+@mcp.tool()
+def file_info(filepath: str) -> str:
+    """Size, modification time and version (sha256, or mtime/size tag for huge files) of a file."""
+    try:
+        ident, digest = _file_version(filepath)
+        return f"size={ident[2]} mtime={ident[1] // 1_000_000_000} version={digest}"
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+@mcp.resource("cache://tool-stats")
+def tool_cache_stats() -> str:
+    """Hit/miss/coalesced counts of the tool result cache, as JSON."""
+    return json.dumps(tool_cache.stats())
+
 @mcp.resource("greeting://{name}")
 def get_greeting(name: str) -> Resource:
     """Get a personalized greeting (resource for context loading)."""
@@ -34,4 +220,4 @@ def get_greeting(name: str) -> Resource:
     )
 
 if __name__ == "__main__":
-    mcp.run(transport="http")
\ No newline at end of file
+    mcp.run(transport="http")
@@ -0,0 +1,76 @@
+# response_cache.py
+# TTL + LRU cache of finished /ask pages, optionally persisted with disk_cache.DiskCache.
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from disk_cache import DiskCache, content_key
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case/whitespace/trailing-punctuation insensitive form of a prompt."""
+    return _SPACES.sub(" ", prompt).strip().rstrip(".!?").strip().lower()
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = 3600, max_entries: int = 256, persist: bool = False):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.disk = DiskCache("ask_responses") if persist else None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (created, value)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt: str, model: str, knowledge: str) -> str:
+        return content_key(normalize_prompt(prompt), model, content_key(knowledge))
+
+    def get(self, key: str):
+        """Return the cached {"explanation", "html"} for ``key`` or None if missing/expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        if self.disk is not None:
+            stored = self.disk.get(key)
+            if stored is not None:
+                data = json.loads(stored)
+                if now - data["created"] <= self.ttl:
+                    self._remember(key, data["created"], data["value"])
+                    with self._lock:
+                        self.hits += 1
+                    return data["value"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, explanation: str, html: str):
+        value = {"explanation": explanation, "html": html}
+        created = time.time()
+        self._remember(key, created, value)
+        if self.disk is not None:
+            self.disk.set(key, json.dumps({"created": created, "value": value}))
+
+    def _remember(self, key, created, value):
+        with self._lock:
+            self._entries[key] = (created, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                    "ttl_s": self.ttl, "max_entries": self.max_entries, "persistent": self.disk is not None}